@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest.sim_mt5 import SimulatedMT5Service, TickFeed, VirtualClock, parse_time
+from bot.channels import ChannelProfile, DEFAULT_MAGIC, load_channel_profiles
+from bot.telegram_client_handler import TelegramClientHandler, ANALYSIS_PROMPT_VERSION
+from services.analysis_cache import AnalysisCache
+from utils import latency
+from utils.latency import LatencyTracker, percentile
+from utils.logger import setup_logger
+
+RecordedMessage = namedtuple("RecordedMessage", ["id", "channel_id", "posted_at", "text"])
+
+
+def message_text(value):
+    # Telegram exports store formatted text as a list of strings and {"text": ...} parts
+    if isinstance(value, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in value)
+    return value or ""
+
+
+def load_messages(path, channel_id=0, interval=1.0):
+    # Reads JSONL (one message per line with text/message/body and an optional
+    # date) or a Telegram Desktop JSON history export. Messages without a date
+    # are spaced `interval` seconds apart.
+    if path.endswith(".jsonl"):
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path) as f:
+            export = json.load(f)
+        records = export.get("messages", []) if isinstance(export, dict) else export
+        if isinstance(export, dict) and export.get("id") is not None:
+            channel_id = export["id"]
+
+    messages = []
+    for index, record in enumerate(records):
+        if record.get("type", "message") != "message":
+            continue
+        text = message_text(record.get("text") or record.get("message") or record.get("body"))
+        if not text.strip():
+            continue
+        if record.get("date_unixtime") is not None:
+            posted_at = float(record["date_unixtime"])
+        elif record.get("date") is not None:
+            posted_at = parse_time(str(record["date"]))
+        else:
+            posted_at = None
+        messages.append(RecordedMessage(
+            record.get("id", record.get("request_id", index)),
+            int(record.get("channel_id", channel_id)),
+            posted_at,
+            text,
+        ))
+    return messages
+
+
+class OfflineCompletionClient:
+    # Used when the replay must not call the LLM: messages the fast-path
+    # parser and the analysis cache can't classify become non-actionable.
+
+    async def chat_completion(self, prompt, timeout=None, **params):
+        return None
+
+    async def close(self):
+        pass
+
+
+class ReplayEngine:
+    # Drives recorded messages through TelegramClientHandler.process_message
+    # against a SimulatedMT5Service. Virtual time jumps from one message to
+    # the next (or sleeps the gap divided by `speed`), so a day of channel
+    # history replays in seconds while processing latency still moves prices.
+
+    def __init__(self, messages, feed, channels=None, together_client=None, analysis_cache=None,
+                 speed=None, balance=10000.0, slippage_points=0, hold_to_end=False):
+        self.feed = feed
+        self.speed = speed
+        self.hold_to_end = hold_to_end
+        start, _ = feed.span()
+        self.messages = self.assign_times(messages, start)
+        self.clock = VirtualClock(self.messages[0].posted_at if self.messages else (start or 0.0))
+        self.sim = SimulatedMT5Service(feed, self.clock, balance=balance, slippage_points=slippage_points)
+        self.initial_balance = balance
+        self.tracker = LatencyTracker(max_samples=max(2048, len(self.messages)))
+        self.together_client = together_client or OfflineCompletionClient()
+        if channels is None:
+            channel_ids = sorted({message.channel_id for message in self.messages}) or [0]
+            channels = [ChannelProfile(channel_id, magic=DEFAULT_MAGIC + i) for i, channel_id in enumerate(channel_ids)]
+        self.handler = TelegramClientHandler(
+            None, None, None, channels, self.sim, self.together_client,
+            analysis_cache if analysis_cache is not None else AnalysisCache(ANALYSIS_PROMPT_VERSION),
+            None, self.tracker,
+        )
+
+    @staticmethod
+    def assign_times(messages, start, interval=1.0):
+        timed = []
+        previous = start or 0.0
+        for message in messages:
+            posted_at = message.posted_at if message.posted_at is not None else previous + interval
+            timed.append(message._replace(posted_at=posted_at))
+            previous = posted_at
+        return sorted(timed, key=lambda message: message.posted_at)
+
+    async def run(self):
+        mt5 = self.handler.mt5
+        started = time.perf_counter()
+        previous = self.messages[0].posted_at if self.messages else None
+        try:
+            for message in self.messages:
+                if self.speed:
+                    await asyncio.sleep(max(0.0, (message.posted_at - previous) / self.speed))
+                previous = message.posted_at
+                await mt5.advance(message.posted_at)
+                self.sim.signal_time = message.posted_at
+
+                channel = self.handler.channels.get(message.channel_id, self.handler.default_channel)
+                signal_id = f"{message.channel_id}:{message.id}"
+                self.tracker.start(signal_id)
+                analysis = None
+                if channel.fast_parse:
+                    with latency.span('fast_parse'):
+                        analysis = channel.parser.parse(message.text)
+                await self.handler.process_message(message.text, channel, analysis, signal_id)
+            wall_seconds = time.perf_counter() - started
+
+            if self.hold_to_end:
+                _, end = self.feed.span()
+                await mt5.advance(end)
+            return self.report(wall_seconds)
+        finally:
+            await self.together_client.close()
+            self.sim.shutdown()
+
+    def report(self, wall_seconds):
+        unrealised = self.sim.mark_to_market()
+        realised = sum(trade.profit for trade in self.sim.closed)
+        by_symbol = {}
+        for trade in self.sim.closed:
+            by_symbol[trade.symbol] = by_symbol.get(trade.symbol, 0.0) + trade.profit
+
+        slippage = sorted(fill.slippage_points for fill in self.sim.fills)
+        virtual_seconds = self.messages[-1].posted_at - self.messages[0].posted_at if self.messages else 0.0
+        report = {
+            "messages": len(self.messages),
+            "wall_seconds": round(wall_seconds, 3),
+            "throughput_msgs_per_sec": round(len(self.messages) / wall_seconds, 2) if wall_seconds else None,
+            "virtual_seconds": virtual_seconds,
+            "trades": {
+                "filled": len(self.sim.fills),
+                "closed": len(self.sim.closed),
+                "open": len(self.sim.positions),
+                "wins": sum(1 for trade in self.sim.closed if trade.profit > 0),
+                "losses": sum(1 for trade in self.sim.closed if trade.profit < 0),
+                "closed_by": {reason: sum(1 for trade in self.sim.closed if trade.reason == reason)
+                              for reason in sorted({trade.reason for trade in self.sim.closed})},
+            },
+            "pnl": {
+                "realised": round(realised, 2),
+                "unrealised": round(unrealised, 2),
+                "total": round(realised + unrealised, 2),
+                "balance": round(self.sim.balance, 2),
+                "by_symbol": {symbol: round(profit, 2) for symbol, profit in by_symbol.items()},
+            },
+            "latency": self.tracker.report()["stages"],
+        }
+        if slippage:
+            report["slippage_points"] = {
+                "mean": round(sum(slippage) / len(slippage), 2),
+                "p50": percentile(slippage, 0.50),
+                "p95": percentile(slippage, 0.95),
+                "max": slippage[-1],
+            }
+        if not isinstance(self.together_client, OfflineCompletionClient):
+            report["models"] = self.handler.model_router.stats()
+        report["analysis_cache"] = self.handler.analysis_cache.stats()
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded channel messages against historical ticks.")
+    parser.add_argument("messages", help="JSONL messages or a Telegram JSON history export")
+    parser.add_argument("--ticks", required=True, help="CSV with time,symbol,bid,ask columns")
+    parser.add_argument("--channels", help="JSON file with a TELEGRAM_CHANNELS list (e.g. config.json)")
+    parser.add_argument("--channel-id", type=int, default=0, help="Channel id for messages that don't carry one")
+    parser.add_argument("--speed", type=float, help="Replay the gaps between messages at this multiple of real time instead of skipping them")
+    parser.add_argument("--llm", action="store_true", help="Call the Together API for messages the parser can't classify")
+    parser.add_argument("--cache", help="Analysis cache database to reuse (e.g. analysis_cache.db)")
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--slippage-points", type=float, default=0, help="Extra adverse slippage applied to every fill")
+    parser.add_argument("--hold-to-end", action="store_true", help="Let open positions run to the end of the tick data")
+    parser.add_argument("--report", help="Write the JSON report to this path")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    setup_logger(level=getattr(logging, args.log_level.upper()))
+
+    channels = None
+    if args.channels:
+        with open(args.channels) as f:
+            channels = load_channel_profiles(json.load(f))
+
+    together_client = None
+    if args.llm:
+        from dotenv import load_dotenv
+        from services.together_client import AsyncTogetherClient
+        load_dotenv()
+        together_client = AsyncTogetherClient(api_key=os.environ["TOGETHER_API_KEY"], stream=True)
+
+    analysis_cache = AnalysisCache(ANALYSIS_PROMPT_VERSION, db_path=args.cache) if args.cache else None
+    engine = ReplayEngine(
+        load_messages(args.messages, args.channel_id),
+        TickFeed.from_csv(args.ticks),
+        channels=channels,
+        together_client=together_client,
+        analysis_cache=analysis_cache,
+        speed=args.speed,
+        balance=args.balance,
+        slippage_points=args.slippage_points,
+        hold_to_end=args.hold_to_end,
+    )
+    report = asyncio.run(engine.run())
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
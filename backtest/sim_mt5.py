@@ -0,0 +1,368 @@
+import bisect
+import csv
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime
+from services.mt5_gateway import MT5Gateway, AsyncMT5Proxy, on_gateway
+from services.mt5_service import SymbolMeta, PositionRow, PositionSnapshot
+
+# Quote as seen by the handler (only bid/ask are used)
+SimTick = namedtuple("SimTick", ["time", "bid", "ask"])
+
+# Mirrors the OrderSendResult/TradeRequest fields the bot reads
+SimRequest = namedtuple("SimRequest", ["action", "symbol", "volume", "type", "price", "sl", "tp", "position", "magic", "comment"])
+SimResult = namedtuple("SimResult", ["retcode", "order", "volume", "price", "comment", "request"])
+
+# One closed position, for the backtest report
+ClosedTrade = namedtuple("ClosedTrade", ["ticket", "symbol", "type", "volume", "price_open", "price_close", "profit", "reason", "opened_at", "closed_at"])
+
+# One fill; slippage is in points against the quote when the signal was posted, positive = adverse
+Fill = namedtuple("Fill", ["ticket", "symbol", "type", "volume", "price", "signal_price", "slippage_points", "time"])
+
+
+def parse_time(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class TickFeed:
+    # Historical quotes per symbol, loaded from a CSV with time,symbol,bid,ask
+    # columns (time as epoch seconds or ISO 8601).
+
+    def __init__(self):
+        self.times = {}
+        self.ticks = {}
+
+    @classmethod
+    def from_csv(cls, path):
+        feed = cls()
+        rows = {}
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                tick = SimTick(parse_time(row["time"]), float(row["bid"]), float(row["ask"]))
+                rows.setdefault(row["symbol"], []).append(tick)
+        for symbol, ticks in rows.items():
+            feed.add(symbol, ticks)
+        return feed
+
+    def add(self, symbol, ticks):
+        ticks = sorted(ticks)
+        self.ticks[symbol] = ticks
+        self.times[symbol] = [tick.time for tick in ticks]
+
+    def symbols(self):
+        return list(self.ticks)
+
+    def index_at(self, symbol, at):
+        # Index of the last tick at or before `at`, or -1
+        return bisect.bisect_right(self.times[symbol], at) - 1
+
+    def quote(self, symbol, at):
+        if symbol not in self.ticks:
+            return None
+        index = self.index_at(symbol, at)
+        return self.ticks[symbol][index] if index >= 0 else None
+
+    def between(self, symbol, start_index, at):
+        end = self.index_at(symbol, at)
+        return self.ticks[symbol][start_index + 1:end + 1], end
+
+    def span(self):
+        starts = [times[0] for times in self.times.values() if times]
+        ends = [times[-1] for times in self.times.values() if times]
+        return (min(starts), max(ends)) if starts else (None, None)
+
+
+class VirtualClock:
+    # Virtual time for a replay. jump_to() moves straight to the next message;
+    # in between, time advances with the real time spent processing so
+    # handler latency shows up as price movement.
+
+    def __init__(self, start=0.0):
+        self.anchor_virtual = start
+        self.anchor_real = time.perf_counter()
+
+    def now(self):
+        return self.anchor_virtual + (time.perf_counter() - self.anchor_real)
+
+    def jump_to(self, at):
+        if at > self.now():
+            self.anchor_virtual = at
+            self.anchor_real = time.perf_counter()
+
+
+class SymbolSpec:
+    __slots__ = ("digits", "point", "contract_size", "volume_min", "volume_step")
+
+    def __init__(self, digits, contract_size, volume_min=0.01, volume_step=0.01):
+        self.digits = digits
+        self.point = 10 ** -digits
+        self.contract_size = contract_size
+        self.volume_min = volume_min
+        self.volume_step = volume_step
+
+    @classmethod
+    def guess(cls, symbol):
+        name = symbol.upper()
+        if name.startswith(("XAU", "GOLD")):
+            return cls(2, 100)
+        if name.startswith(("XAG", "SILVER")):
+            return cls(3, 5000)
+        if "JPY" in name:
+            return cls(3, 100000)
+        return cls(5, 100000)
+
+
+class SimPosition:
+    __slots__ = ("ticket", "symbol", "type", "volume", "price_open", "price_current", "sl", "tp", "profit", "magic", "opened_at")
+
+    def __init__(self, ticket, symbol, type, volume, price_open, sl, tp, magic, opened_at):
+        self.ticket = ticket
+        self.symbol = symbol
+        self.type = type
+        self.volume = volume
+        self.price_open = price_open
+        self.price_current = price_open
+        self.sl = sl
+        self.tp = tp
+        self.profit = 0.0
+        self.magic = magic
+        self.opened_at = opened_at
+
+
+class SimulatedMT5Service:
+    # Stand-in for MT5Service with the same public methods, filling orders
+    # from a TickFeed at the clock's virtual time. Calls still go through an
+    # MT5Gateway thread so the execution engine and async proxy behave as
+    # they do live. SL/TP are checked against every tick when advance() moves
+    # the clock forward.
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_SLTP = 6
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TIME_GTC = 0
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+
+    def __init__(self, feed, clock, balance=10000.0, specs=None, slippage_points=0):
+        self.gateway = MT5Gateway(name="sim-mt5-gateway")
+        self.feed = feed
+        self.clock = clock
+        self.specs = dict(specs or {})
+        self.slippage_points = slippage_points
+        self.balance = balance
+        self.positions = {}
+        self.closed = []
+        self.fills = []
+        self.cursors = {}
+        self.next_ticket = 1
+        self.signal_time = None
+        self.snapshot_version = 0
+        self.symbol_cache = {}
+        self.filling_modes = {}
+        self.is_initialized = True
+
+    def spec(self, symbol):
+        spec = self.specs.get(symbol)
+        if spec is None:
+            spec = self.specs[symbol] = SymbolSpec.guess(symbol)
+        return spec
+
+    def quote(self, symbol):
+        return self.feed.quote(symbol, self.clock.now())
+
+    def result(self, request, order=0, volume=0.0, price=0.0, retcode=None, comment="Request executed"):
+        sim_request = SimRequest(*(request.get(field) for field in SimRequest._fields))
+        return SimResult(self.TRADE_RETCODE_DONE if retcode is None else retcode, order, volume, price, comment, sim_request)
+
+    def reject(self, request, comment):
+        logging.error("Simulated order rejected: %s", comment)
+        return self.result(request, retcode=self.TRADE_RETCODE_INVALID, comment=comment)
+
+    @on_gateway
+    def send_order(self, request):
+        if request.get("action") == self.TRADE_ACTION_SLTP:
+            return self.modify_position(request["position"], request.get("sl"), request.get("tp"))
+        if request.get("position"):
+            return self.close_position(request["position"], request.get("volume"))
+        return self.open_position(request)
+
+    def open_position(self, request):
+        symbol = request["symbol"]
+        tick = self.quote(symbol)
+        if tick is None:
+            return self.reject(request, f"no quote for {symbol}")
+
+        spec = self.spec(symbol)
+        buy = request["type"] == self.ORDER_TYPE_BUY
+        price = round((tick.ask if buy else tick.bid) + (1 if buy else -1) * self.slippage_points * spec.point, spec.digits)
+        now = self.clock.now()
+        if not any(position.symbol == symbol for position in self.positions.values()):
+            self.cursors[symbol] = self.feed.index_at(symbol, now)
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.positions[ticket] = SimPosition(ticket, symbol, request["type"], request["volume"], price,
+                                             request.get("sl") or 0.0, request.get("tp") or 0.0, request.get("magic", 0), now)
+
+        signal_tick = self.feed.quote(symbol, self.signal_time) if self.signal_time is not None else None
+        signal_price = (signal_tick.ask if buy else signal_tick.bid) if signal_tick else price
+        slippage = ((price - signal_price) if buy else (signal_price - price)) / spec.point
+        self.fills.append(Fill(ticket, symbol, request["type"], request["volume"], price, signal_price, slippage, now))
+        return self.result(request, ticket, request["volume"], price)
+
+    def close_order(self, ticket):
+        position = self.positions.get(ticket)
+        return self.close_position(ticket, position.volume) if position else None
+
+    @on_gateway
+    def close_position(self, ticket, volume=None, position=None):
+        sim_position = self.positions.get(ticket)
+        request = {"action": self.TRADE_ACTION_DEAL, "position": ticket, "volume": volume}
+        if sim_position is None:
+            return self.reject(request, f"position {ticket} not found")
+        # Volume to close; anything less than the position's volume is a partial close
+        volume = sim_position.volume if volume is None else volume
+        if not 0 < volume <= sim_position.volume + 1e-9:
+            return self.reject(request, f"invalid volume {volume} for position {ticket} ({sim_position.volume})")
+        tick = self.quote(sim_position.symbol)
+        if tick is None:
+            return self.reject(request, f"no quote for {sim_position.symbol}")
+        price = tick.bid if sim_position.type == self.ORDER_TYPE_BUY else tick.ask
+        self.book_close(sim_position, price, "signal", self.clock.now(), volume)
+        return self.result(request, ticket, volume, price)
+
+    @on_gateway
+    def modify_position(self, ticket, sl=None, tp=None, position=None):
+        sim_position = self.positions.get(ticket)
+        if sim_position is None:
+            return self.reject({"action": self.TRADE_ACTION_SLTP, "position": ticket}, f"position {ticket} not found")
+
+        # Same rules as MT5Service.modify_position: fixed distances when neither
+        # level is given, otherwise a missing level keeps its current value
+        spec = self.spec(sim_position.symbol)
+        if sl is None and tp is None:
+            tick = self.quote(sim_position.symbol)
+            if tick is None:
+                return self.reject({"action": self.TRADE_ACTION_SLTP, "position": ticket}, f"no quote for {sim_position.symbol}")
+            buy = sim_position.type == self.ORDER_TYPE_BUY
+            current_price = tick.ask if buy else tick.bid
+            sl = current_price - 3000 * spec.point if buy else current_price + 3000 * spec.point
+            tp = current_price + 11000 * spec.point if buy else current_price - 11000 * spec.point
+        else:
+            sl = sim_position.sl if sl is None else sl
+            tp = sim_position.tp if tp is None else tp
+        sim_position.sl = round(sl, spec.digits)
+        sim_position.tp = round(tp, spec.digits)
+        request = {"action": self.TRADE_ACTION_SLTP, "symbol": sim_position.symbol, "position": ticket,
+                   "sl": sim_position.sl, "tp": sim_position.tp}
+        return self.result(request, ticket, sim_position.volume)
+
+    def book_close(self, position, price, reason, at, volume=None):
+        # Closes `volume` lots (all of them by default); the rest stays open under the same ticket
+        spec = self.spec(position.symbol)
+        volume = position.volume if volume is None else volume
+        remaining = round(position.volume - volume, 8)
+        direction = 1 if position.type == self.ORDER_TYPE_BUY else -1
+        profit = (price - position.price_open) * direction * volume * spec.contract_size
+        self.balance += profit
+        if remaining > 0:
+            position.volume = remaining
+        else:
+            del self.positions[position.ticket]
+        self.closed.append(ClosedTrade(position.ticket, position.symbol, position.type, volume,
+                                       position.price_open, price, profit, reason, position.opened_at, at))
+
+    @on_gateway
+    def advance(self, at):
+        # Walks every tick up to `at`, closing positions whose SL or TP was touched
+        for symbol in {position.symbol for position in self.positions.values()}:
+            ticks, self.cursors[symbol] = self.feed.between(symbol, self.cursors.get(symbol, -1), at)
+            for tick in ticks:
+                for position in [p for p in self.positions.values() if p.symbol == symbol and p.opened_at <= tick.time]:
+                    if position.type == self.ORDER_TYPE_BUY:
+                        if position.sl and tick.bid <= position.sl:
+                            self.book_close(position, position.sl, "sl", tick.time)
+                        elif position.tp and tick.bid >= position.tp:
+                            self.book_close(position, position.tp, "tp", tick.time)
+                    else:
+                        if position.sl and tick.ask >= position.sl:
+                            self.book_close(position, position.sl, "sl", tick.time)
+                        elif position.tp and tick.ask <= position.tp:
+                            self.book_close(position, position.tp, "tp", tick.time)
+        self.clock.jump_to(at)
+
+    def mark_to_market(self):
+        unrealised = 0.0
+        for position in self.positions.values():
+            tick = self.quote(position.symbol)
+            if tick is None:
+                continue
+            spec = self.spec(position.symbol)
+            buy = position.type == self.ORDER_TYPE_BUY
+            position.price_current = tick.bid if buy else tick.ask
+            position.profit = (position.price_current - position.price_open) * (1 if buy else -1) * position.volume * spec.contract_size
+            unrealised += position.profit
+        return unrealised
+
+    @on_gateway
+    def snapshot_positions(self, symbol=None, magic=None):
+        self.mark_to_market()
+        self.snapshot_version += 1
+        rows = tuple(
+            PositionRow(p.ticket, p.symbol, p.type, p.volume, p.price_open, p.price_current, p.sl, p.tp, p.profit, p.magic)
+            for p in self.positions.values()
+            if (symbol is None or p.symbol == symbol) and (magic is None or p.magic == magic)
+        )
+        return PositionSnapshot(self.snapshot_version, self.clock.now(), rows)
+
+    @on_gateway
+    def get_open_position(self, ticket):
+        return self.positions.get(ticket)
+
+    @on_gateway
+    def get_account_info(self):
+        unrealised = self.mark_to_market()
+        return {"balance": self.balance, "equity": self.balance + unrealised, "margin": 0.0, "free_margin": self.balance + unrealised}
+
+    @on_gateway
+    def get_symbol_meta(self, symbol):
+        if symbol not in self.feed.ticks:
+            return None
+        spec = self.spec(symbol)
+        return SymbolMeta(symbol, spec.point, spec.digits, spec.volume_min, spec.volume_step, 0)
+
+    get_symbol_info = get_symbol_meta
+
+    @on_gateway
+    def resolve_symbol(self, symbol):
+        for candidate in (symbol, f"{symbol}.sml", symbol.upper()):
+            symbol_meta = self.get_symbol_meta(candidate)
+            if symbol_meta is not None:
+                self.symbol_cache[symbol] = symbol_meta
+                return symbol_meta
+        logging.info("Symbol %s is not in the tick feed", symbol)
+        return None
+
+    def peek_tick(self, symbol, max_age=None):
+        return self.quote(symbol)
+
+    @on_gateway
+    def get_tick(self, symbol, max_age=None):
+        return self.quote(symbol)
+
+    @on_gateway
+    def get_current_price(self, symbol):
+        tick = self.quote(symbol)
+        return None if tick is None else (tick.bid + tick.ask) / 2
+
+    def watch_symbol(self, symbol):
+        pass
+
+    def async_api(self):
+        return AsyncMT5Proxy(self)
+
+    def shutdown(self):
+        self.gateway.stop()
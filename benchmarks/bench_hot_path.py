@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_mt5
+
+# The fake has to be registered before MT5Service loads MetaTrader5
+terminal = fake_mt5.install()
+
+import json5
+from bot.channels import ChannelProfile
+from bot.position_book import PositionRecord
+from bot.signal_model import normalise_analysis
+from bot.telegram_client_handler import TelegramClientHandler, ANALYSIS_PROMPT_VERSION
+from services.analysis_cache import AnalysisCache
+from services.mt5_service import MT5Service
+from services.together_client import AsyncTogetherClient
+from utils.latency import percentile
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+MESSAGE = "XAUUSD BUY NOW 2300-2296\nSL 2290\nTP1 2305\nTP2 2310\nTP3 2320"
+
+LLM_RESPONSE = """```
+{
+  action: 'open_trade',
+  symbol: 'XAUUSD',
+  direction: 'buy',
+  entry: {min: 2296, max: 2300},
+  stop_loss: 2290,
+  take_profit: {tp1: 2305, tp2: 2310, tp3: 2320},
+  comment: null,
+}
+```"""
+
+
+def summarise(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min_us": round(ordered[0] * 1e6, 2),
+        "median_us": round(statistics.median(ordered) * 1e6, 2),
+        "p95_us": round(percentile(ordered, 0.95) * 1e6, 2),
+    }
+
+
+def measure(func, repeat, setup=None, warmup=3):
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarise(samples)
+
+
+async def measure_async(func, repeat, setup=None, warmup=3):
+    # func returns a fresh coroutine per run; setup runs outside the timed region
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        await func()
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarise(samples)
+
+
+class HotPathBench:
+    # Runs the handler's order path against the fake terminal. Each case
+    # seeds the terminal and the position book first so the timed region
+    # only covers the handler call.
+
+    def __init__(self, repeat=200, position_counts=(1, 10, 100)):
+        self.repeat = repeat
+        self.position_counts = position_counts
+        self.channel = ChannelProfile(1, name="bench")
+        self.service = MT5Service()
+        self.handler = TelegramClientHandler(
+            None, None, None, [self.channel], self.service, AsyncTogetherClient(api_key="benchmark"),
+            AnalysisCache(ANALYSIS_PROMPT_VERSION),
+        )
+        self.results = {}
+
+    def seed(self, count):
+        terminal.clear_positions()
+        self.handler.positions.clear()
+        for position in terminal.seed_positions(count, magic=self.channel.magic):
+            self.handler.positions.add(PositionRecord.from_position(position))
+
+    def open_signal(self):
+        signal = normalise_analysis({'action': 'open_trade', 'symbol': 'XAUUSD', 'direction': 'buy',
+                                     'entry': {'min': 2296, 'max': 2300}, 'stop_loss': 2290,
+                                     'take_profit': [2305, 2310, 2320]}, 'bench')
+        return signal.round_prices(2)
+
+    def run_sync_cases(self):
+        handler = self.handler
+        self.results["generate_analysis_prompt"] = measure(
+            lambda: handler.generate_analysis_prompt(MESSAGE, self.channel), self.repeat * 10)
+        self.results["clean_json5_loads"] = measure(
+            lambda: json5.loads(LLM_RESPONSE.strip().strip('```')), self.repeat)
+        self.results["get_symbol_info"] = measure(
+            lambda: self.service.get_symbol_info("XAUUSD.sml"), self.repeat)
+        self.results["resolve_symbol[cold]"] = measure(
+            lambda: self.service.resolve_symbol("XAUUSD"), self.repeat, setup=self.service.symbol_cache.clear)
+        self.results["resolve_symbol[cached]"] = measure(
+            lambda: self.service.resolve_symbol("XAUUSD"), self.repeat)
+
+    async def run_async_cases(self):
+        handler = self.handler
+        self.results["open_trades"] = await measure_async(
+            lambda: handler.open_trades(self.open_signal(), self.channel), self.repeat, setup=lambda: self.seed(0))
+
+        for count in self.position_counts:
+            # Breakeven closes half the positions, so every run starts from a fresh set
+            self.results[f"handle_breakeven[{count}]"] = await measure_async(
+                lambda: handler.handle_breakeven(handler.positions.for_magic(self.channel.magic)),
+                max(10, self.repeat // count), setup=lambda: self.seed(count))
+
+        for count in self.position_counts:
+            self.seed(count)
+            self.results[f"synchronize_trades[{count}]"] = await measure_async(
+                handler.synchronize_trades, max(10, self.repeat // max(1, count // 10)))
+
+    def run(self):
+        try:
+            self.run_sync_cases()
+            asyncio.run(self.run_async_cases())
+        finally:
+            self.service.shutdown()
+        return self.results
+
+
+def compare(results, baseline, tolerance, min_delta_us=1.0):
+    # Returns (name, baseline median, current median) for every case slower than the
+    # tolerance allows; min_delta_us keeps sub-microsecond jitter from counting
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        slower = current["median_us"] - previous["median_us"]
+        if slower > min_delta_us and current["median_us"] > previous["median_us"] * (1 + tolerance):
+            regressions.append((name, previous["median_us"], current["median_us"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the signal hot path against an in-process fake MetaTrader5.")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per case")
+    parser.add_argument("--positions", default="1,10,100", help="Comma-separated open position counts")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every fake terminal call")
+    parser.add_argument("--order-latency-ms", type=float, help="Latency for order_send only (defaults to --latency-ms)")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="Write the results as the new baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    terminal.default_latency = args.latency_ms / 1000
+    if args.order_latency_ms is not None:
+        terminal.latency["order_send"] = args.order_latency_ms / 1000
+
+    bench = HotPathBench(args.repeat, tuple(int(count) for count in args.positions.split(",")))
+    results = bench.run()
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "order_latency_ms": args.order_latency_ms,
+            "repeat": args.repeat,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    for name, stats in results.items():
+        print(f"{name:32} median {stats['median_us']:>10.2f} us  p95 {stats['p95_us']:>10.2f} us  ({stats['runs']} runs)")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("latency_ms") != args.latency_ms:
+            print("Warning: baseline was recorded with a different --latency-ms")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous:.2f} us -> {current:.2f} us")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
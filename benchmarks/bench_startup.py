@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+ENTRY_POINTS = ("core.main", "gui.main_app", "bot.telegram_client_handler", "backtest.replay")
+
+# Packages that must only load when their subsystem starts
+HEAVY = ("MetaTrader5", "PySide6", "telethon", "together", "aiohttp", "requests", "json5")
+
+# Heavy packages an entry point is expected to import eagerly
+EAGER_ALLOWED = {"gui.main_app": ("PySide6",)}
+
+
+def parse_importtime(stderr):
+    # "-X importtime" writes "import time: self [us] | cumulative | imported package"
+    # per module, nested imports indented by two spaces per level
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def profile_import(module, fake_mt5=False):
+    code = f"import {module}"
+    if fake_mt5:
+        code = f"from benchmarks import fake_mt5; fake_mt5.install(); {code}"
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                             capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit {process.returncode}"
+        raise RuntimeError(f"import {module} failed: {error}")
+    return wall, parse_importtime(process.stderr)
+
+
+def profile_entry_point(module, runs, fake_mt5=False):
+    walls, totals = [], []
+    modules = []
+    for _ in range(runs):
+        wall, modules = profile_import(module, fake_mt5)
+        walls.append(wall)
+        totals.append(sum(cumulative for _, _, cumulative, depth in modules if depth == 0))
+
+    loaded = {name.split(".")[0] for name, _, _, _ in modules}
+    heavy = sorted(package for package in HEAVY if package in loaded)
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:10]
+    return {
+        "import_ms": round(statistics.median(totals) / 1000, 2),
+        "wall_ms": round(statistics.median(walls) * 1000, 2),
+        "modules": len(modules),
+        "heavy": heavy,
+        "unexpected_heavy": [package for package in heavy if package not in EAGER_ALLOWED.get(module, ())],
+        "slowest_self_ms": [[name, round(self_us / 1000, 2)] for name, self_us, _, _ in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile entry point imports with python -X importtime.")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--fake-mt5", action="store_true", help="Register the fake MetaTrader5 module first (Linux CI)")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="Write the results as the new baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed import time growth before a module counts as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    for module in args.modules:
+        try:
+            results[module] = profile_entry_point(module, args.runs, args.fake_mt5)
+        except RuntimeError as e:
+            print(e)
+            failed = True
+            continue
+        stats = results[module]
+        print(f"{module:32} import {stats['import_ms']:>8.2f} ms  process {stats['wall_ms']:>8.2f} ms  "
+              f"{stats['modules']} modules  heavy: {', '.join(stats['heavy']) or '-'}")
+        if stats["unexpected_heavy"]:
+            print(f"EAGER IMPORT {module}: {', '.join(stats['unexpected_heavy'])}")
+            failed = True
+
+    if args.save:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "runs": args.runs,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        for module, stats in results.items():
+            previous = baseline.get(module)
+            if previous is not None and stats["import_ms"] > previous["import_ms"] * (1 + args.tolerance):
+                print(f"REGRESSION {module}: {previous['import_ms']:.2f} ms -> {stats['import_ms']:.2f} ms")
+                failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import itertools
+import sys
+import threading
+import time
+import types
+from collections import namedtuple
+
+# In-process stand-in for the MetaTrader5 package so the order path can be
+# imported and timed on machines without a terminal. Every API call sleeps
+# for its configured latency, the way the real blocking IPC calls do.
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_SLTP = 6
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_FILL = 10030
+
+SymbolInfo = namedtuple("SymbolInfo", ["name", "point", "digits", "volume_min", "volume_step", "filling_mode", "visible", "bid", "ask"])
+Tick = namedtuple("Tick", ["time", "bid", "ask", "last"])
+TradePosition = namedtuple("TradePosition", ["ticket", "symbol", "type", "volume", "price_open", "price_current", "sl", "tp", "profit", "magic"])
+TradeRequest = namedtuple("TradeRequest", ["action", "symbol", "volume", "type", "price", "sl", "tp", "position", "magic", "comment"])
+OrderSendResult = namedtuple("OrderSendResult", ["retcode", "order", "volume", "price", "comment", "request"])
+OrderCheckResult = namedtuple("OrderCheckResult", ["retcode", "margin", "comment", "request"])
+AccountInfo = namedtuple("AccountInfo", ["balance", "equity", "margin", "margin_free"])
+
+
+class FakeTerminal:
+    # State behind the fake module: symbols with a fixed quote, open
+    # positions, and per-function latency in seconds.
+
+    def __init__(self, latency=None, default_latency=0.0):
+        self.latency = dict(latency or {})
+        self.default_latency = default_latency
+        self.symbols = {}
+        self.positions = {}
+        self.tickets = itertools.count(1000)
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.add_symbol("XAUUSD.sml", bid=2300.00, ask=2300.30, digits=2)
+        self.add_symbol("EURUSD", bid=1.08000, ask=1.08010, digits=5)
+
+    def add_symbol(self, name, bid, ask, digits, volume_min=0.01, volume_step=0.01):
+        self.symbols[name] = SymbolInfo(name, 10 ** -digits, digits, volume_min, volume_step, SYMBOL_FILLING_IOC, True, bid, ask)
+
+    def wait(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.latency.get(name, self.default_latency)
+        if delay:
+            time.sleep(delay)
+
+    def seed_positions(self, count, symbol="XAUUSD.sml", magic=234000, type=ORDER_TYPE_BUY, volume=0.02):
+        info = self.symbols[symbol]
+        seeded = []
+        for _ in range(count):
+            ticket = next(self.tickets)
+            self.positions[ticket] = TradePosition(ticket, symbol, type, volume, info.ask, info.bid, 0.0, 0.0, 0.0, magic)
+            seeded.append(self.positions[ticket])
+        return seeded
+
+    def clear_positions(self):
+        self.positions.clear()
+
+    # MetaTrader5 API
+
+    def initialize(self, *args, **kwargs):
+        self.wait("initialize")
+        return True
+
+    def shutdown(self):
+        self.wait("shutdown")
+        return True
+
+    def last_error(self):
+        return (1, "Success")
+
+    def symbol_info(self, symbol):
+        self.wait("symbol_info")
+        return self.symbols.get(symbol)
+
+    def symbol_select(self, symbol, enable=True):
+        self.wait("symbol_select")
+        return symbol in self.symbols
+
+    def symbol_info_tick(self, symbol):
+        self.wait("symbol_info_tick")
+        info = self.symbols.get(symbol)
+        return Tick(int(time.time()), info.bid, info.ask, 0.0) if info else None
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        self.wait("positions_get")
+        with self.lock:
+            positions = list(self.positions.values())
+        if ticket is not None:
+            positions = [p for p in positions if p.ticket == ticket]
+        if symbol is not None:
+            positions = [p for p in positions if p.symbol == symbol]
+        return tuple(positions)
+
+    def account_info(self):
+        self.wait("account_info")
+        return AccountInfo(10000.0, 10000.0, 0.0, 10000.0)
+
+    def order_check(self, request):
+        self.wait("order_check")
+        symbol = self.symbols.get(request.get("symbol"))
+        if symbol is None:
+            return OrderCheckResult(TRADE_RETCODE_INVALID, 0.0, "Invalid symbol", self.trade_request(request))
+        filling = request.get("type_filling", ORDER_FILLING_FOK)
+        allowed = {ORDER_FILLING_FOK: SYMBOL_FILLING_FOK, ORDER_FILLING_IOC: SYMBOL_FILLING_IOC}.get(filling)
+        if allowed is not None and not symbol.filling_mode & allowed:
+            return OrderCheckResult(TRADE_RETCODE_INVALID_FILL, 0.0, "Unsupported filling mode", self.trade_request(request))
+        return OrderCheckResult(0, 0.0, "Done", self.trade_request(request))
+
+    def order_send(self, request):
+        self.wait("order_send")
+        trade_request = self.trade_request(request)
+        symbol = self.symbols.get(request.get("symbol"))
+        with self.lock:
+            if request.get("action") == TRADE_ACTION_SLTP:
+                position = self.positions.get(request.get("position"))
+                if position is None:
+                    return OrderSendResult(TRADE_RETCODE_INVALID, 0, 0.0, 0.0, "Invalid request", trade_request)
+                self.positions[position.ticket] = position._replace(sl=request.get("sl") or 0.0, tp=request.get("tp") or 0.0)
+                return OrderSendResult(TRADE_RETCODE_DONE, position.ticket, position.volume, 0.0, "Request executed", trade_request)
+            if symbol is None:
+                return OrderSendResult(TRADE_RETCODE_INVALID, 0, 0.0, 0.0, "Invalid symbol", trade_request)
+
+            price = symbol.ask if request.get("type") == ORDER_TYPE_BUY else symbol.bid
+            if request.get("position"):
+                position = self.positions.pop(request["position"], None)
+                if position is None:
+                    return OrderSendResult(TRADE_RETCODE_INVALID, 0, 0.0, 0.0, "Position not found", trade_request)
+                return OrderSendResult(TRADE_RETCODE_DONE, position.ticket, position.volume, price, "Request executed", trade_request)
+
+            ticket = next(self.tickets)
+            self.positions[ticket] = TradePosition(ticket, symbol.name, request.get("type"), request.get("volume"), price,
+                                                   price, request.get("sl", 0.0), request.get("tp", 0.0), 0.0, request.get("magic", 0))
+            return OrderSendResult(TRADE_RETCODE_DONE, ticket, request.get("volume"), price, "Request executed", trade_request)
+
+    @staticmethod
+    def trade_request(request):
+        return TradeRequest(*(request.get(field) for field in TradeRequest._fields))
+
+
+def install(latency=None, default_latency=0.0):
+    # Registers the fake as the MetaTrader5 module; call before the first MT5Service is created.
+    terminal = FakeTerminal(latency, default_latency)
+    module = types.ModuleType("MetaTrader5")
+    for name, value in globals().items():
+        if name.isupper():
+            setattr(module, name, value)
+    for name in ("initialize", "shutdown", "last_error", "symbol_info", "symbol_select", "symbol_info_tick",
+                 "positions_get", "account_info", "order_check", "order_send"):
+        setattr(module, name, getattr(terminal, name))
+    module.terminal = terminal
+    sys.modules["MetaTrader5"] = module
+    return terminal
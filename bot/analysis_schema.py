@@ -0,0 +1,74 @@
+from numbers import Number
+
+# Shape of the analysis dict produced by the LLM prompt and the fast-path
+# parser. The schema is sent with JSON-mode requests; validate_analysis()
+# decides whether a small model's answer can be trusted or must be escalated.
+
+ANALYSIS_ACTIONS = ('open_trade', 'update_trade', 'breakeven', 'close_trade')
+
+# Returned by the model for messages that need no action
+NON_ACTIONS = (None, 'After Trade')
+
+PRICE = {"type": ["number", "null"]}
+
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": ["string", "null"], "enum": list(ANALYSIS_ACTIONS) + ["After Trade", None]},
+        "symbol": {"type": ["string", "null"]},
+        "direction": {"type": ["string", "null"], "enum": ["buy", "sell", None]},
+        "entry": {
+            "anyOf": [
+                PRICE,
+                {"type": "object", "properties": {"min": PRICE, "max": PRICE}},
+            ]
+        },
+        "stop_loss": PRICE,
+        "take_profit": {"anyOf": [PRICE, {"type": "array", "items": {"type": "number"}}, {"type": "object"}]},
+        "comment": {"type": ["string", "null"]},
+    },
+    "required": ["action"],
+}
+
+
+def is_price(value):
+    return isinstance(value, Number) and not isinstance(value, bool) and value > 0
+
+
+def validate_analysis(analysis):
+    # Returns a list of problems; an empty list means the analysis is usable as is.
+    if not isinstance(analysis, dict):
+        return ["not an object"]
+
+    action = analysis.get('action')
+    if action in NON_ACTIONS:
+        return []
+    if action not in ANALYSIS_ACTIONS:
+        return [f"unknown action {action!r}"]
+
+    problems = []
+    stop_loss = analysis.get('stop_loss')
+    if stop_loss is not None and not is_price(stop_loss):
+        problems.append(f"stop_loss {stop_loss!r} is not a price")
+
+    take_profit = analysis.get('take_profit')
+    if isinstance(take_profit, dict):
+        take_profit = list(take_profit.values())
+    targets = take_profit if isinstance(take_profit, list) else [take_profit]
+    if any(target is not None and not is_price(target) for target in targets):
+        problems.append(f"take_profit {analysis.get('take_profit')!r} is not a price")
+
+    if action == 'open_trade':
+        if not analysis.get('symbol'):
+            problems.append("open_trade without symbol")
+        if analysis.get('direction') not in ('buy', 'sell'):
+            problems.append(f"ambiguous direction {analysis.get('direction')!r}")
+        entry = analysis.get('entry')
+        if isinstance(entry, dict):
+            if not (is_price(entry.get('min')) and is_price(entry.get('max'))):
+                problems.append(f"entry range {entry!r} is incomplete")
+        elif entry is not None and not is_price(entry):
+            problems.append(f"entry {entry!r} is not a price")
+    elif action == 'update_trade' and stop_loss is None and take_profit is None:
+        problems.append("update_trade without new levels")
+    return problems
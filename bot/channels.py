@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from bot.dispatch_queue import DispatchQueue, PRIORITY_ACTIONS
+from bot.signal_parser import SignalParser
+from utils import latency
+
+# Magic number used when a channel doesn't configure its own
+DEFAULT_MAGIC = 234000
+
+
+class ChannelProfile:
+    # Per-channel settings: which parser/prompt variant to use, the magic
+    # number its orders carry, and how much backlog its pipeline may hold.
+    __slots__ = ("channel_id", "name", "magic", "default_symbol", "prompt_hint", "fast_parse", "queue_size", "workers",
+                 "max_age", "parser")
+
+    def __init__(self, channel_id, name=None, magic=DEFAULT_MAGIC, default_symbol=None, prompt_hint=None,
+                 fast_parse=True, queue_size=100, workers=2, max_age=60.0):
+        self.channel_id = int(channel_id)
+        self.name = name or str(channel_id)
+        self.magic = int(magic)
+        self.default_symbol = default_symbol
+        self.prompt_hint = prompt_hint
+        self.fast_parse = fast_parse
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_age = max_age
+        self.parser = SignalParser(default_symbol)
+
+    @property
+    def cache_scope(self):
+        # Analyses depend on the prompt hint, so channels with different hints don't share cache entries
+        return self.prompt_hint or ""
+
+    def __repr__(self):
+        return f"ChannelProfile(channel_id={self.channel_id}, name={self.name!r}, magic={self.magic})"
+
+
+def load_channel_profiles(config):
+    # TELEGRAM_CHANNELS (config.json) is a list of objects with an "id" and any
+    # ChannelProfile keyword; without it the single TELEGRAM_SOURCE_CHANNEL_ID is used.
+    channels = config.get('TELEGRAM_CHANNELS')
+    if not channels:
+        return [ChannelProfile(config['TELEGRAM_SOURCE_CHANNEL_ID'])]
+
+    profiles = []
+    for entry in channels:
+        options = dict(entry)
+        profiles.append(ChannelProfile(options.pop('id'), **options))
+
+    magics = [profile.magic for profile in profiles]
+    if len(set(magics)) != len(magics):
+        raise ValueError("Each channel in TELEGRAM_CHANNELS needs its own magic number")
+    return profiles
+
+
+class ChannelPipeline:
+    # Dispatch queue plus a fixed set of worker tasks for one channel.
+    # Messages from different channels never wait on each other. Within a
+    # channel, the fast-path parse at enqueue time decides the lane (trade
+    # management goes first) and the ordering key (the symbol, or None when
+    # the LLM has to work it out).
+
+    def __init__(self, profile, process):
+        self.profile = profile
+        self.process = process
+        self.queue = DispatchQueue(profile.queue_size, max_age=profile.max_age)
+        self.tasks = []
+
+    def start(self):
+        self.tasks = [
+            asyncio.create_task(self.work(), name=f"channel-{self.profile.name}-{i}")
+            for i in range(self.profile.workers)
+        ]
+
+    def offer(self, message_content, trace=None, posted_at=None, late=False, signal_id=None):
+        analysis = None
+        if self.profile.fast_parse:
+            with latency.span('fast_parse'):
+                analysis = self.profile.parser.parse(message_content)
+
+        action = analysis['action'] if analysis is not None else None
+        if analysis is not None and action is None:
+            key = ""  # chatter: only ordered against other chatter and unknown messages
+        else:
+            key = analysis.get('symbol') if analysis is not None else None
+        self.queue.put_nowait(
+            (message_content, trace, analysis, signal_id, time.perf_counter_ns()),
+            key=key,
+            priority=action in PRIORITY_ACTIONS,
+            posted_at=posted_at,
+            supersede=action == 'close_trade',
+            late=late,
+        )
+
+    async def work(self):
+        while True:
+            entry = await self.queue.get()
+            message_content, trace, analysis, signal_id, queued_ns = entry.item
+            latency.current_trace.set(trace)
+            latency.record('queue', time.perf_counter_ns() - queued_ns)
+            try:
+                await self.process(message_content, self.profile, analysis, signal_id)
+            except Exception as e:
+                logging.error("Error in channel %s worker: %s", self.profile.name, e, exc_info=True)
+            finally:
+                self.queue.task_done(entry)
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def stats(self):
+        return dict(self.queue.stats(), workers=len(self.tasks))
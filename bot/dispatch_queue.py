@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import logging
+import time
+
+# Actions that manage already-open positions and jump ahead of new entries
+PRIORITY_ACTIONS = ('close_trade', 'breakeven', 'update_trade')
+
+
+class DispatchEntry:
+    __slots__ = ("seq", "key", "priority", "posted_at", "item", "late")
+
+    def __init__(self, seq, key, priority, posted_at, item, late=False):
+        self.seq = seq
+        self.key = key
+        self.priority = priority
+        self.posted_at = posted_at
+        self.item = item
+        # Fetched after a reconnect rather than delivered live
+        self.late = late
+
+    def age(self, now=None):
+        return (now or time.time()) - self.posted_at
+
+
+def conflicts(a, b):
+    # A None key (symbol unknown until the LLM has looked at it) orders
+    # against everything; otherwise only entries for the same symbol do.
+    return a is None or b is None or a == b
+
+
+def overtakes(entry, earlier):
+    # A priority entry only waits for a queued normal entry it is known to
+    # follow, i.e. both name the same symbol; a breakeven or close with no
+    # symbol must not sit behind unrelated opens.
+    return entry.priority and not earlier.priority and (entry.key is None or earlier.key is None or entry.key != earlier.key)
+
+
+class DispatchQueue:
+    # Bounded queue with a priority lane for trade-management messages.
+    # Entries with conflicting keys never run concurrently, and within a lane
+    # they are handed out in arrival order, so open -> update -> close for one
+    # symbol stays sequenced while other symbols proceed in parallel. A
+    # priority entry only waits for queued normal entries on the same known
+    # symbol. Normal-lane entries older than max_age are shed rather than
+    # acted on late, and a superseding entry (a close) sheds the queued
+    # entries it would undo. Late entries (caught up after a reconnect) that
+    # are already past their age limit are rejected on arrival.
+
+    def __init__(self, maxsize=100, max_age=None, priority_max_age=None):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.priority_max_age = priority_max_age
+        self.entries = []
+        self.active = {}
+        self.counter = itertools.count()
+        self.changed = asyncio.Event()
+        self.shed = 0
+        self.late = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def age_limit(self, entry):
+        return self.priority_max_age if entry.priority else self.max_age
+
+    def put_nowait(self, item, key=None, priority=False, posted_at=None, supersede=False, late=False):
+        entry = DispatchEntry(next(self.counter), key, priority, posted_at or time.time(), item, late)
+        if late:
+            self.late += 1
+            limit = self.age_limit(entry)
+            if limit is not None and entry.age() > limit:
+                self.shed += 1
+                logging.warning("Rejecting late message for %s (age %.1fs)", key or "unknown symbol", entry.age())
+                return None
+        if supersede:
+            for queued in [queued for queued in self.entries if not queued.priority and conflicts(key, queued.key)]:
+                self.shed_entry(queued, "superseded")
+        if len(self.entries) >= self.maxsize:
+            self.shed_entry(self.pick_victim(), "queue full")
+        self.entries.append(entry)
+        self.notify()
+        return entry
+
+    def pick_victim(self):
+        for entry in self.entries:
+            if not entry.priority:
+                return entry
+        return self.entries[0]
+
+    def shed_entry(self, entry, reason):
+        self.entries.remove(entry)
+        self.shed += 1
+        logging.warning("Shedding queued %smessage for %s (%s, age %.1fs)", "late " if entry.late else "",
+                        entry.key or "unknown symbol", reason, entry.age())
+
+    def shed_stale(self):
+        now = time.time()
+        for entry in list(self.entries):
+            limit = self.age_limit(entry)
+            if limit is not None and entry.age(now) > limit:
+                self.shed_entry(entry, "stale")
+
+    def next_ready(self):
+        # Priority entries first, then by arrival; an entry is only ready when
+        # nothing in flight, and nothing earlier it cannot overtake, conflicts
+        # with its key.
+        for priority in (True, False):
+            for index, entry in enumerate(self.entries):
+                if entry.priority != priority:
+                    continue
+                if any(conflicts(entry.key, key) for key in self.active.values()):
+                    continue
+                if any(conflicts(entry.key, earlier.key) and not overtakes(entry, earlier)
+                       for earlier in self.entries[:index]):
+                    continue
+                return entry
+        return None
+
+    async def get(self):
+        while True:
+            self.shed_stale()
+            entry = self.next_ready()
+            if entry is not None:
+                self.entries.remove(entry)
+                self.active[entry.seq] = entry.key
+                return entry
+            self.changed.clear()
+            await self.changed.wait()
+
+    def task_done(self, entry):
+        self.active.pop(entry.seq, None)
+        self.notify()
+
+    def notify(self):
+        self.changed.set()
+
+    def stats(self):
+        return {
+            "queued": len(self.entries),
+            "priority": sum(1 for entry in self.entries if entry.priority),
+            "active": len(self.active),
+            "shed": self.shed,
+            "late": self.late,
+        }
@@ -0,0 +1,150 @@
+import logging
+
+# MT5 POSITION_TYPE_BUY / POSITION_TYPE_SELL
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+
+
+class PositionRecord:
+    # Attribute names mirror MT5's TradePosition so records can be used
+    # wherever the handler previously used a positions_get() result.
+    __slots__ = ("ticket", "symbol", "type", "volume", "price_open", "sl", "tp", "magic", "signal_id", "opened_version")
+
+    def __init__(self, ticket, symbol, type, volume, price_open, sl=0.0, tp=0.0, magic=0, signal_id=None, opened_version=0):
+        self.ticket = ticket
+        self.symbol = symbol
+        self.type = type
+        self.volume = volume
+        self.price_open = price_open
+        self.sl = sl
+        self.tp = tp
+        self.magic = magic
+        self.signal_id = signal_id
+        # Latest snapshot version when the fill was booked; snapshots up to it may predate the fill
+        self.opened_version = opened_version
+
+    @classmethod
+    def from_position(cls, position, signal_id=None):
+        return cls(position.ticket, position.symbol, position.type, position.volume,
+                   position.price_open, position.sl, position.tp, position.magic, signal_id)
+
+    @property
+    def side(self):
+        return "buy" if self.type == POSITION_TYPE_BUY else "sell"
+
+    def __repr__(self):
+        return (f"PositionRecord(ticket={self.ticket}, symbol={self.symbol}, side={self.side}, "
+                f"volume={self.volume}, price_open={self.price_open}, sl={self.sl}, tp={self.tp}, "
+                f"magic={self.magic}, signal_id={self.signal_id})")
+
+
+class PositionBook:
+    # Positions opened by the bot, indexed by ticket, symbol, signal id and magic.
+
+    def __init__(self):
+        self.by_ticket = {}
+        self.by_symbol = {}
+        self.by_signal = {}
+        self.by_magic = {}
+        self.snapshot_version = 0
+
+    def __len__(self):
+        return len(self.by_ticket)
+
+    def __iter__(self):
+        return iter(list(self.by_ticket.values()))
+
+    def __contains__(self, ticket):
+        return ticket in self.by_ticket
+
+    def get(self, ticket):
+        return self.by_ticket.get(ticket)
+
+    def tickets(self):
+        return list(self.by_ticket)
+
+    def for_symbol(self, symbol):
+        return [self.by_ticket[ticket] for ticket in self.by_symbol.get(symbol, ())]
+
+    def for_signal(self, signal_id):
+        return [self.by_ticket[ticket] for ticket in self.by_signal.get(signal_id, ())]
+
+    def for_magic(self, magic):
+        return [self.by_ticket[ticket] for ticket in self.by_magic.get(magic, ())]
+
+    def add(self, record):
+        if record.ticket in self.by_ticket:
+            self.remove(record.ticket)
+        self.by_ticket[record.ticket] = record
+        self.by_symbol.setdefault(record.symbol, {})[record.ticket] = None
+        self.by_magic.setdefault(record.magic, {})[record.ticket] = None
+        if record.signal_id is not None:
+            self.by_signal.setdefault(record.signal_id, {})[record.ticket] = None
+        return record
+
+    def remove(self, ticket):
+        record = self.by_ticket.pop(ticket, None)
+        if record is None:
+            return None
+        self.discard_index(self.by_symbol, record.symbol, ticket)
+        self.discard_index(self.by_magic, record.magic, ticket)
+        if record.signal_id is not None:
+            self.discard_index(self.by_signal, record.signal_id, ticket)
+        return record
+
+    @staticmethod
+    def discard_index(index, key, ticket):
+        tickets = index.get(key)
+        if tickets is None:
+            return
+        tickets.pop(ticket, None)
+        if not tickets:
+            del index[key]
+
+    def update_levels(self, ticket, sl=None, tp=None):
+        record = self.by_ticket.get(ticket)
+        if record is None:
+            return None
+        if sl is not None:
+            record.sl = sl
+        if tp is not None:
+            record.tp = tp
+        return record
+
+    def clear(self):
+        self.by_ticket.clear()
+        self.by_symbol.clear()
+        self.by_signal.clear()
+        self.by_magic.clear()
+
+    def reconcile(self, positions, version=None):
+        # Diffs the book against one bulk positions snapshot: tickets that are
+        # no longer open are dropped, surviving ones get fresh volume/SL/TP.
+        if version is not None:
+            if version <= self.snapshot_version:
+                logging.info("Ignoring stale positions snapshot %s (book is at %s)", version, self.snapshot_version)
+                return []
+            self.snapshot_version = version
+
+        live = {position.ticket: position for position in positions or ()}
+        removed = [
+            ticket for ticket, record in self.by_ticket.items()
+            if ticket not in live and (version is None or record.opened_version < version)
+        ]
+        for ticket in removed:
+            self.remove(ticket)
+
+        updated = 0
+        for ticket, record in self.by_ticket.items():
+            position = live.get(ticket)
+            if position is None:
+                continue
+            if (record.volume, record.sl, record.tp) != (position.volume, position.sl, position.tp):
+                record.volume = position.volume
+                record.sl = position.sl
+                record.tp = position.tp
+                updated += 1
+
+        if removed or updated:
+            logging.info("Position book reconciled: %s closed, %s updated, %s open", len(removed), updated, len(self.by_ticket))
+        return removed
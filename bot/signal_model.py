@@ -0,0 +1,132 @@
+import re
+from numbers import Number
+from bot.analysis_schema import ANALYSIS_ACTIONS
+from bot.signal_parser import SYMBOL_ALIASES
+
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+DIRECTIONS = {'buy': 'buy', 'long': 'buy', 'sell': 'sell', 'short': 'sell'}
+
+
+class TradeSignal:
+    # Normalised analysis of one message. Prices are floats (or None), take
+    # profits are always a tuple, and an entry range is split into
+    # entry_min/entry_max, so order code never has to guess at shapes.
+    __slots__ = ("signal_id", "action", "symbol", "direction", "entry", "entry_min", "entry_max",
+                 "stop_loss", "take_profits", "comment")
+
+    def __init__(self, action, symbol=None, direction=None, entry=None, entry_min=None, entry_max=None,
+                 stop_loss=None, take_profits=(), comment=None, signal_id=None):
+        self.signal_id = signal_id
+        self.action = action
+        self.symbol = symbol
+        self.direction = direction
+        self.entry = entry
+        self.entry_min = entry_min
+        self.entry_max = entry_max
+        self.stop_loss = stop_loss
+        self.take_profits = take_profits
+        self.comment = comment
+
+    @property
+    def actionable(self):
+        return self.action is not None
+
+    def take_profit_at(self, index):
+        return self.take_profits[index] if index < len(self.take_profits) else None
+
+    def round_prices(self, digits):
+        # Rounds every price to the symbol's quote precision
+        def rounded(value):
+            return None if value is None else round(value, digits)
+        self.entry = rounded(self.entry)
+        self.entry_min = rounded(self.entry_min)
+        self.entry_max = rounded(self.entry_max)
+        self.stop_loss = rounded(self.stop_loss)
+        self.take_profits = tuple(round(value, digits) for value in self.take_profits)
+        return self
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"TradeSignal(action={self.action}, symbol={self.symbol}, direction={self.direction}, "
+                f"entry={self.entry}, entry_range=({self.entry_min}, {self.entry_max}), "
+                f"stop_loss={self.stop_loss}, take_profits={self.take_profits})")
+
+
+def to_price(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, Number):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_RE.search(value.replace(",", ""))
+        return float(match.group()) if match else None
+    return None
+
+
+def to_prices(value):
+    # Number, "2310/2320" string, list, or {"tp1": ..., "tp2": ...} -> tuple of floats
+    if value is None:
+        return ()
+    if isinstance(value, dict):
+        value = [value[key] for key in sorted(value, key=lambda key: (len(key), key))]  # tp2 before tp10
+    elif isinstance(value, str):
+        value = NUMBER_RE.findall(value.replace(",", ""))
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return tuple(price for price in map(to_price, value) if price is not None)
+
+
+def normalise_analysis(analysis, signal_id=None, digits=None):
+    # Single pass from the parser/LLM dict to a TradeSignal; digits, when
+    # known, rounds the prices to the symbol's precision.
+    action = analysis.get('action')
+    if isinstance(action, str):
+        action = action.strip().lower()
+    if action not in ANALYSIS_ACTIONS:
+        action = None
+
+    symbol = analysis.get('symbol')
+    if isinstance(symbol, str) and symbol.strip():
+        symbol = symbol.strip().upper()
+        symbol = SYMBOL_ALIASES.get(symbol, symbol)
+    else:
+        symbol = None
+
+    direction = analysis.get('direction')
+    direction = DIRECTIONS.get(direction.strip().lower()) if isinstance(direction, str) else None
+
+    entry = entry_min = entry_max = None
+    raw_entry = analysis.get('entry')
+    if isinstance(raw_entry, dict):
+        low = to_price(raw_entry.get('min', raw_entry.get('range_start')))
+        high = to_price(raw_entry.get('max', raw_entry.get('range_end')))
+        if low is not None and high is not None:
+            entry_min, entry_max = min(low, high), max(low, high)
+        else:
+            entry = to_price(raw_entry.get('price')) or low or high
+    elif isinstance(raw_entry, (list, tuple)) and len(raw_entry) == 2:
+        low, high = to_price(raw_entry[0]), to_price(raw_entry[1])
+        if low is not None and high is not None:
+            entry_min, entry_max = min(low, high), max(low, high)
+    else:
+        entry = to_price(raw_entry)
+
+    comment = analysis.get('comment')
+    signal = TradeSignal(
+        action,
+        symbol=symbol,
+        direction=direction,
+        entry=entry,
+        entry_min=entry_min,
+        entry_max=entry_max,
+        stop_loss=to_price(analysis.get('stop_loss')),
+        take_profits=to_prices(analysis.get('take_profit')),
+        comment=comment if isinstance(comment, str) else None,
+        signal_id=signal_id,
+    )
+    if digits is not None:
+        signal.round_prices(digits)
+    return signal
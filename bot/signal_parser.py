@@ -0,0 +1,130 @@
+import re
+import logging
+
+# Rule-based fast path for the channel's common message formats. parse()
+# returns the same analysis dict the LLM prompt asks for, or None when the
+# message doesn't match a known format and should go to the LLM instead.
+
+SYMBOL_ALIASES = {
+    "GOLD": "XAUUSD",
+    "XAU": "XAUUSD",
+    "SILVER": "XAGUSD",
+    "XAG": "XAGUSD",
+}
+
+NUMBER = r"(\d+(?:\.\d+)?)"
+
+CURRENCY = r"(?:XAU|XAG|EUR|GBP|USD|JPY|AUD|NZD|CAD|CHF|BTC|ETH)"
+
+SYMBOL_RE = re.compile(r"\b(" + CURRENCY + CURRENCY + r"|GOLD|SILVER|XAU|XAG|US30|NAS100|US100|SPX500|GER40)(?:\.[A-Z]+)?\b")
+DIRECTION_RE = re.compile(r"\b(BUY|SELL|LONG|SHORT)\b")
+ENTRY_RE = re.compile(
+    r"(?:\b(?:BUY|SELL|LONG|SHORT)\b(?:\s+(?!SL\b|TP\d?\b)[A-Z.@:]+)*?|@|\bENTRY\b)\s*:?\s*@?\s*"
+    + NUMBER + r"(?:\s*(?:-|/|TO)\s*" + NUMBER + r")?"
+)
+MARKET_RE = re.compile(r"\b(?:NOW|MARKET|CMP)\b")
+# "SL 2295", "SL to 2295", "SL moved to 2295"
+MOVED_TO = r"(?:\s+(?:MOVED\s+)?TO\b)?"
+SL_KEYWORD = r"\b(?:SL|STOP\s*LOSS|STOPLOSS)\b"
+TP_KEYWORD = r"\b(?:TP\d?|TAKE\s*PROFIT\d?|TARGET\d?)"
+SL_RE = re.compile(SL_KEYWORD + MOVED_TO + r"\s*[:@=]?\s*" + NUMBER)
+TP_RE = re.compile(TP_KEYWORD + MOVED_TO + r"\s*[:@=]?\s*" + NUMBER + r"((?:\s*/\s*\d+(?:\.\d+)?)*)")
+
+BREAKEVEN_RE = re.compile(
+    r"\bBREAK\s*-?\s*EVEN\b"
+    r"|\b(?:SL|STOP\s*LOSS|STOPS?)\s+(?:TO|AT|ON|@)\s+(?:BE|B/E|ENTRY|ENTRIES|OPEN)\b"
+    r"|^(?:MOVE\s+|SET\s+)?(?:TO\s+)?(?:BE|B/E)\s*[!.]*$"
+)
+CLOSE_RE = re.compile(r"^(?:PLEASE\s+)?(?:CLOSE|EXIT)(?:\s+(?:ALL|NOW|EVERYTHING|TRADES?|POSITIONS?|IT))*\s*[!.]*$")
+CLOSE_WORD_RE = re.compile(r"\b(?:CLOSE|CLOSED|EXIT)\b")
+# Update wording, or a level moved "to" a price
+UPDATE_RE = re.compile(r"\b(?:MOVE|MOVED|SET|CHANGE|UPDATE|NEW|ADJUST)\b|(?:" + SL_KEYWORD + "|" + TP_KEYWORD + r")\s+(?:MOVED\s+)?TO\s+\d")
+KEYWORD_RE = re.compile(r"\b(?:BUY|SELL|LONG|SHORT|SL|TP|STOP|CLOSE|EXIT|ENTRY|TARGET|PROFIT|LOSS|BE|BREAKEVEN|HOLD|PIPS?)\b")
+
+
+class SignalParser:
+    def __init__(self, default_symbol=None):
+        self.default_symbol = default_symbol
+
+    def parse(self, message_content):
+        text = " ".join(message_content.upper().split())
+        if not text:
+            return {'action': None}
+
+        if CLOSE_RE.match(text):
+            return self.build('close_trade', comment=message_content)
+
+        direction_match = DIRECTION_RE.search(text)
+        if direction_match is None or CLOSE_WORD_RE.search(text):
+            if BREAKEVEN_RE.search(text):
+                return self.build('breakeven', comment=message_content)
+
+            stop_loss = self.find_stop_loss(text)
+            take_profit = self.find_take_profit(text)
+            if (stop_loss is not None or take_profit is not None) and UPDATE_RE.search(text):
+                return self.build('update_trade', symbol=self.find_symbol(text), stop_loss=stop_loss,
+                                  take_profit=take_profit, comment=message_content)
+
+            # Chatter: nothing that looks like prices or trading vocabulary.
+            if direction_match is None and not any(c.isdigit() for c in text) and not KEYWORD_RE.search(text) and not SYMBOL_RE.search(text):
+                return {'action': None}
+            return None
+
+        symbol = self.find_symbol(text)
+        entry = self.find_entry(text)
+        if symbol is None or (entry is None and not MARKET_RE.search(text)):
+            return None
+
+        direction = direction_match.group(1)
+        return self.build(
+            'open_trade',
+            symbol=symbol,
+            direction='buy' if direction in ('BUY', 'LONG') else 'sell',
+            entry=entry,
+            stop_loss=self.find_stop_loss(text),
+            take_profit=self.find_take_profit(text),
+            comment=message_content,
+        )
+
+    def build(self, action, symbol=None, direction=None, entry=None, stop_loss=None, take_profit=None, comment=None):
+        analysis = {
+            'action': action,
+            'symbol': symbol,
+            'direction': direction,
+            'entry': entry,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'comment': comment,
+        }
+        logging.info("Signal parser classified message as %s", action)
+        return analysis
+
+    def find_symbol(self, text):
+        match = SYMBOL_RE.search(text)
+        if match is None:
+            return self.default_symbol
+        symbol = match.group(1)
+        return SYMBOL_ALIASES.get(symbol, symbol)
+
+    def find_entry(self, text):
+        match = ENTRY_RE.search(text)
+        if match is None:
+            return None
+        first = float(match.group(1))
+        if match.group(2) is None:
+            return first
+        second = float(match.group(2))
+        return {'min': min(first, second), 'max': max(first, second)}
+
+    def find_stop_loss(self, text):
+        match = SL_RE.search(text)
+        return float(match.group(1)) if match else None
+
+    def find_take_profit(self, text):
+        targets = []
+        for match in TP_RE.finditer(text):
+            targets.append(float(match.group(1)))
+            targets.extend(float(value) for value in re.findall(NUMBER, match.group(2)))
+        if not targets:
+            return None
+        return targets[0] if len(targets) == 1 else targets
@@ -3,10 +3,10 @@ import logging
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ContextTypes
 from services.mt5_service import MT5Service
-from services.together_client import TogetherClient
+from services.together_client import AsyncTogetherClient
 
 class TelegramBotHandler:
-    def __init__(self, token, channel_id, mt5_service: MT5Service, together_client: TogetherClient):
+    def __init__(self, token, channel_id, mt5_service: MT5Service, together_client: AsyncTogetherClient):
         self.token = token
         self.channel_id = channel_id
         self.mt5_service = mt5_service
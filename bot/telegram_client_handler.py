@@ -1,30 +1,77 @@
 import logging
 import asyncio
-from telethon import TelegramClient, events
-from PySide6.QtCore import QObject, Signal, Slot
 from services.mt5_service import MT5Service
-from services.together_client import TogetherClient
-import json5
+from services.together_client import AsyncTogetherClient, ModelRouter
+from services.analysis_cache import AnalysisCache
+from services.execution_engine import ExecutionEngine
+from services.trade_journal import TradeJournal
+from bot.analysis_schema import ANALYSIS_SCHEMA, validate_analysis
+from bot.channels import ChannelPipeline, ChannelProfile, DEFAULT_MAGIC
+from bot.signal_model import normalise_analysis
+from bot.position_book import PositionBook, PositionRecord
+from utils import latency
+from utils.latency import LatencyTracker
+from utils.backoff import Backoff
+from collections import deque
+import copy
+import itertools
 import traceback
 import threading
+import time
 
-class TelegramClientHandler(QObject):
-    log_signal = Signal(str)
+# Bump whenever generate_analysis_prompt changes so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = 1
 
-    def __init__(self, api_id, api_hash, phone_number, source_channel_id, mt5_service: MT5Service, together_client: TogetherClient):
-        super().__init__()
+# Number of positions opened per signal
+TRADE_LEGS = 4
+
+# Most recent messages fetched per channel when catching up after a reconnect
+CATCH_UP_LIMIT = 100
+
+# Messages without a Telegram id get the process start time plus a sequence
+# number, so their signal ids stay unique within a run and across restarts
+SIGNAL_ID_PREFIX = str(time.time_ns() // 1_000_000)
+signal_sequence = itertools.count(1)
+
+class TelegramClientHandler:
+    # Ingestion, analysis and execution on one asyncio loop. serve() runs it
+    # on the caller's loop (headless mode); start() hosts it on a background
+    # thread for the GUI.
+
+    def __init__(self, api_id, api_hash, phone_number, channels, mt5_service: MT5Service, together_client: AsyncTogetherClient, analysis_cache: AnalysisCache = None, trade_journal: TradeJournal = None, latency_tracker: LatencyTracker = None, warm_symbols=None):
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone_number = phone_number
-        self.source_channel_id = source_channel_id
+        if not isinstance(channels, (list, tuple)):
+            channels = [ChannelProfile(channels)]
+        self.channels = {channel.channel_id: channel for channel in channels}
+        self.default_channel = channels[0]
+        self.pipelines = {}
         self.mt5_service = mt5_service
+        self.mt5 = mt5_service.async_api()
         self.together_client = together_client
+        self.model_router = ModelRouter(together_client, validate_analysis, ANALYSIS_SCHEMA)
+        self.execution_engine = ExecutionEngine(mt5_service)
+        self.analysis_cache = analysis_cache if analysis_cache is not None else AnalysisCache(ANALYSIS_PROMPT_VERSION)
         self.client = None
-        self.opened_trades = []
+        self.positions = PositionBook()
+        self.trade_journal = trade_journal
+        self.latency = latency_tracker if latency_tracker is not None else LatencyTracker()
+        self.latency.add_source('models', self.model_router.stats)
         self.loop = None
         self.thread = None
+        self.ready_listeners = []
+        # Symbols selected and dry-run in MT5 before the first signal
+        self.warm_symbols = tuple(warm_symbols or sorted({channel.default_symbol or "XAUUSD" for channel in channels}))
+        self.readiness = None
+        self.keep_alive_task = None
+        # Highest message id dispatched per channel, and recent ids to drop duplicates
+        self.last_message_ids = {}
+        self.seen_messages = {}
+        self.subscribed = False
+        # Live messages held back while a catch-up is queuing missed ones
+        self.held = None
 
-    @Slot()
     def start(self):
         self.thread = threading.Thread(target=self.run_async_loop, daemon=True)
         self.thread.start()
@@ -32,147 +79,330 @@ class TelegramClientHandler(QObject):
     def run_async_loop(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
-        self.loop.run_until_complete(self.run())
+        try:
+            self.loop.run_until_complete(self.serve())
+        finally:
+            self.loop.close()
+
+    async def serve(self):
+        # Runs until cancelled, then drains the pipelines and closes connections
+        try:
+            await self.run()
+        finally:
+            if self.keep_alive_task is not None:
+                self.keep_alive_task.cancel()
+            await self.stop_pipelines()
+            if self.client is not None:
+                await self.client.disconnect()
+            await self.together_client.close()
+
+    def add_ready_listener(self, listener):
+        # Called once the client is subscribed to the channels and listening
+        self.ready_listeners.append(listener)
 
     async def run(self):
+        # telethon is loaded when the Telegram subsystem starts, not on import
+        from telethon import TelegramClient
+        self.loop = asyncio.get_running_loop()
+        await self.recover_positions()
+        self.start_pipelines()
+        if self.keep_alive_task is None:
+            self.keep_alive_task = asyncio.ensure_future(self.together_client.keep_alive())
+        if self.client is None:
+            # One client for the whole run; reconnects reuse its connection state and auth
+            self.client = TelegramClient('session', self.api_id, self.api_hash, loop=self.loop)
+
+        backoff = Backoff(initial=0.5, maximum=60.0)
         while True:
+            # Where each channel stood before this (re)connect; empty on the first one
+            catch_up_from = dict(self.last_message_ids)
+            connected_at = time.monotonic()
             try:
-                self.client = TelegramClient('session', self.api_id, self.api_hash, loop=self.loop)
-                await self.start_client()
+                await self.start_client(catch_up_from)
+                logging.warning("Telegram client disconnected.")
             except Exception as e:
-                logging.error(f"Unexpected error in run method: {e}", exc_info=True)
-                await asyncio.sleep(60)  # Wait before retrying
-            finally:
-                logging.info("Restarting Telegram client handler...")
-
-    async def start_client(self):
-        await self.client.start(phone=self.phone_number)
-        logging.info(f"Listening for messages in channel ID: {self.source_channel_id}")
-        self.client.add_event_handler(self.handler, events.NewMessage(chats=int(self.source_channel_id)))
-        logging.info("Telegram client started. Listening for new messages...")
+                logging.error("Telegram client failed: %s", e, exc_info=True)
+            if time.monotonic() - connected_at > backoff.maximum:
+                # The connection was up for a while; treat this as a fresh failure
+                backoff.reset()
+            delay = backoff.next()
+            logging.info("Reconnecting to Telegram in %.2fs...", delay)
+            await asyncio.sleep(delay)
+
+    def start_pipelines(self):
+        # One queue and worker set per channel, kept across client restarts
+        for channel_id, channel in self.channels.items():
+            if channel_id not in self.pipelines:
+                self.pipelines[channel_id] = ChannelPipeline(channel, self.process_message)
+                self.pipelines[channel_id].start()
+
+    async def stop_pipelines(self):
+        for pipeline in self.pipelines.values():
+            await pipeline.stop()
+        self.pipelines.clear()
+
+    async def start_client(self, catch_up_from=None):
+        from telethon import events
+        # Warm-up runs alongside the Telegram handshake
+        warm_up = asyncio.ensure_future(self.warm_up())
+        if catch_up_from:
+            self.held = []
+        try:
+            await self.client.start(phone=self.phone_number)
+            logging.info("Listening for messages in channels: %s", list(self.channels.values()))
+            if not self.subscribed:
+                self.client.add_event_handler(self.handler, events.NewMessage(chats=list(self.channels)))
+                self.subscribed = True
+            logging.info("Telegram client started. Listening for new messages...")
+            if catch_up_from:
+                await self.catch_up(catch_up_from)
+                # Live messages held during catch-up go out now; they don't wait for warm-up
+                self.release_held()
+            self.readiness = await warm_up
+        finally:
+            warm_up.cancel()
+            self.release_held()
+        for listener in self.ready_listeners:
+            listener()
         await self.client.run_until_disconnected()
 
+    async def warm_up(self):
+        # Primes the LLM connection and model, and selects, caches and
+        # dry-runs an order for every warm symbol. Failures are reported, not
+        # raised: the bot still listens, the first signal just pays the cost.
+        started = time.perf_counter()
+        llm, symbols = await asyncio.gather(
+            self.model_router.warm_up(),
+            self.mt5.warm_up(self.warm_symbols),
+            return_exceptions=True,
+        )
+        if isinstance(llm, Exception):
+            logging.warning("LLM warm-up failed: %s", llm)
+            llm = False
+        if isinstance(symbols, Exception):
+            logging.warning("MT5 warm-up failed: %s", symbols)
+            symbols = {symbol: str(symbols) for symbol in self.warm_symbols}
+
+        readiness = {
+            "llm": llm,
+            "symbols": {symbol: problem or "ready" for symbol, problem in symbols.items()},
+            "warm_up_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if llm and not any(symbols.values()):
+            logging.info("Ready for signals: %s", readiness)
+        else:
+            logging.warning("Not fully warmed up, the first signal may be slow: %s", readiness)
+        return readiness
+
+    async def catch_up(self, since):
+        # Fetches what each channel posted after its last dispatched message
+        # and queues it as late, so the pipeline sheds whatever is too old to act on
+        for channel_id, last_id in since.items():
+            channel = self.channels[channel_id]
+            try:
+                missed = [message async for message in self.client.iter_messages(channel_id, min_id=last_id, limit=CATCH_UP_LIMIT)]
+            except Exception as e:
+                logging.error("Failed to fetch missed messages on %s: %s", channel.name, e, exc_info=True)
+                continue
+            if missed:
+                logging.info("Catching up on %s missed message(s) on %s", len(missed), channel.name)
+            for message in reversed(missed):
+                self.dispatch(channel, message, late=True)
+
+    def release_held(self):
+        held, self.held = self.held, None
+        for channel, message, received_ns in held or ():
+            self.dispatch(channel, message, received_ns)
+        # Traces started here belong to the queued messages, not to this task
+        latency.current_trace.set(None)
+
+    def claim_message(self, channel_id, message_id):
+        # True the first time a message id is seen; catch-up and live updates overlap after a reconnect
+        seen = self.seen_messages.get(channel_id)
+        if seen is None:
+            seen = self.seen_messages[channel_id] = deque(maxlen=2 * CATCH_UP_LIMIT)
+        if message_id in seen:
+            return False
+        seen.append(message_id)
+        if message_id > self.last_message_ids.get(channel_id, 0):
+            self.last_message_ids[channel_id] = message_id
+        return True
+
+    def dispatch(self, channel, message, received_ns=None, late=False):
+        if not message.message or not self.claim_message(channel.channel_id, message.id):
+            return
+        posted_at = message.date.timestamp()
+        signal_id = f"{channel.channel_id}:{message.id}"
+        trace = self.latency.start(signal_id, received_ns)
+        # Telegram post time -> handler entry; caught-up messages are kept out of the live figure
+        latency.record('late_delivery' if late else 'delivery', max(0, int((time.time() - posted_at) * 1e9)))
+        logging.info("Received %smessage on %s: %s", "late " if late else "", channel.name, message.message)
+
+        # Hand off to the channel's workers so a slow message never holds up the event loop
+        self.pipelines[channel.channel_id].offer(message.message, trace, posted_at, late, signal_id)
+
     async def handler(self, event):
+        received_ns = time.perf_counter_ns()
         try:
-            message_content = event.message.message
-            if not message_content:
+            channel = self.channels.get(event.chat_id)
+            if channel is None:
+                logging.warning("Ignoring message from unconfigured chat %s", event.chat_id)
                 return
-            logging.info(f"Received message: {message_content}")
-
-            await self.process_message(message_content)
+            if self.held is not None:
+                self.held.append((channel, event.message, received_ns))
+                return
+            self.dispatch(channel, event.message, received_ns)
         except Exception as e:
-            logging.error(f"Error in handler: {e}", exc_info=True)
-
-    async def process_message(self, message_content):
+            logging.error("Error in handler: %s", e, exc_info=True)
+
+    async def process_message(self, message_content, channel=None, analysis=None, signal_id=None):
+        # analysis is the channel parser's result from enqueue time; None sends the message to the LLM.
+        # signal_id is "<channel id>:<message id>" for Telegram messages.
+        channel = channel or self.default_channel
+        signal_id = signal_id or f"{SIGNAL_ID_PREFIX}-{next(signal_sequence)}"
+        trace = latency.current_trace.get() or self.latency.start(signal_id)
+        trace.signal_id = signal_id
         try:
-            logging.info(f"Starting to process message: {message_content}")
-            analysis = await self.analyze_message(message_content)
-            
-            logging.info(f"Analysis result: {analysis}")
-            
-            if analysis['action'] is None:
-                logging.info(f"Non-actionable message received and processed: {message_content}")
+            logging.info("Starting to process message: %s", message_content)
+            self.journal('signal', signal_id=signal_id, channel=channel.name, message=message_content)
+
+            if analysis is None:
+                # The fast-path parser couldn't classify the message; fall back to the LLM
+                analysis = await self.analyze_message(message_content, channel)
+            # Normalised once; everything downstream works from the typed signal
+            signal = normalise_analysis(analysis, signal_id)
+            self.journal('analysis', signal_id=signal_id, analysis=signal.to_dict())
+
+            logging.info("Analysis result: %s", signal)
+
+            if not signal.actionable:
+                logging.info("Non-actionable message received and processed: %s", message_content)
                 logging.info("Waiting for next message...")
                 return
 
-            logging.info(f"Proceeding with action: {analysis['action']}")
+            logging.info("Proceeding with action: %s", signal.action)
+
+            # One bulk reconcile per message; the actions below work from the book
+            await self.synchronize_trades()
 
-            if analysis['action'] == 'open_trade':
-                await self.synchronize_trades(analysis['symbol'])
-                if self.opened_trades:
-                    await self.adjust_existing_trades(analysis)
+            # Each channel only manages the positions carrying its own magic number,
+            # and every action works on one symbol's legs at a time
+            if signal.action == 'open_trade':
+                # Only legs on the signal's own symbol are adjusted; other symbols are left alone
+                symbol_meta = await self.round_signal_prices(signal)
+                symbol_trades = self.symbol_trades(channel, symbol_meta.name) if symbol_meta is not None else []
+                if symbol_trades:
+                    await self.adjust_existing_trades(signal, symbol_trades)
                 else:
-                    await self.open_trades(analysis)
-            elif analysis['action'] == 'update_trade':
-                await self.update_trades(analysis)
-            elif analysis['action'] == 'breakeven':
-                await self.handle_breakeven()
-            elif analysis['action'] == 'close_trade':
-                await self.close_trades(analysis)
+                    await self.open_trades(signal, channel)
+            elif signal.action in ('update_trade', 'breakeven', 'close_trade'):
+                for symbol_signal, trades in await self.symbol_groups(signal, channel):
+                    if signal.action == 'update_trade':
+                        await self.update_trades(symbol_signal, trades)
+                    elif signal.action == 'breakeven':
+                        await self.handle_breakeven(trades)
+                    else:
+                        await self.close_trades(symbol_signal, trades)
             else:
-                logging.info(f"Unrecognized action in message: {message_content}")
+                logging.info("Unrecognized action in message: %s", message_content)
         except Exception as e:
-            logging.error(f"Error processing message: {e}", exc_info=True)
+            logging.error("Error processing message: %s", e, exc_info=True)
         finally:
+            latency.current_trace.set(None)
+            breakdown = self.latency.finish(trace)
+            logging.info("Signal %s latency breakdown: %s", signal_id, breakdown)
             logging.info("Message processing complete. Waiting for next message...")
 
-    async def adjust_existing_trades(self, analysis):
-        if not self.opened_trades:
+    async def round_signal_prices(self, signal):
+        # Rounds to the signal's symbol; returns that symbol's metadata
+        if not signal.symbol:
+            return None
+        symbol_meta = await self.mt5.resolve_symbol(signal.symbol)
+        if symbol_meta is not None:
+            signal.round_prices(symbol_meta.digits)
+        return symbol_meta
+
+    async def symbol_groups(self, signal, channel):
+        # (signal rounded for the symbol, the channel's legs on it) pairs for a
+        # management message: just the named symbol, or every symbol the
+        # channel holds when the message doesn't name one
+        if signal.symbol:
+            symbol_meta = await self.round_signal_prices(signal)
+            return [(signal, self.symbol_trades(channel, symbol_meta.name) if symbol_meta is not None else [])]
+
+        by_symbol = {}
+        for trade in self.positions.for_magic(channel.magic):
+            by_symbol.setdefault(trade.symbol, []).append(trade)
+        groups = []
+        for symbol, trades in by_symbol.items():
+            symbol_signal = copy.copy(signal)
+            symbol_meta = await self.mt5.get_symbol_meta(symbol)
+            if symbol_meta is not None:
+                symbol_signal.round_prices(symbol_meta.digits)
+            groups.append((symbol_signal, trades))
+        return groups or [(signal, [])]
+
+    def symbol_trades(self, channel, symbol):
+        # Positions the channel holds on one broker symbol
+        return [trade for trade in self.positions.for_symbol(symbol) if trade.magic == channel.magic]
+
+    async def adjust_existing_trades(self, signal, trades):
+        if not trades:
             logging.info("No trades to adjust.")
             return
 
-        logging.info(f"Adjusting existing trades with fixed 300 pips SL and 1100 pips TP")
-
-        for trade_ticket in self.opened_trades:
-            trade = self.mt5_service.get_open_position(trade_ticket)
-            if trade is None:
-                logging.error(f"Failed to retrieve trade information for ticket {trade_ticket}")
-                continue
+        logging.info("Adjusting existing trades with fixed 300 pips SL and 1100 pips TP")
 
-            current_price = self.mt5_service.get_current_price(trade.symbol)
-            logging.info(f"Attempting to adjust trade {trade_ticket}. Current price: {current_price}, Current SL: {trade.sl}, Current TP: {trade.tp}")
-            result = self.mt5_service.modify_position(trade_ticket)
+        for trade in trades:
+            current_price = await self.mt5.get_current_price(trade.symbol)
+            logging.info("Attempting to adjust trade %s. Current price: %s, Current SL: %s, Current TP: %s", trade.ticket, current_price, trade.sl, trade.tp)
+            result = await self.mt5.modify_position(trade.ticket, position=trade)
 
             if result is None:
-                logging.error(f"Failed to adjust trade {trade_ticket}: No result returned")
+                logging.error("Failed to adjust trade %s: No result returned", trade.ticket)
             elif result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
-                # Get the updated position to log the new SL and TP
-                updated_trade = self.mt5_service.get_open_position(trade_ticket)
-                if updated_trade:
-                    logging.info(f"Trade {trade_ticket} adjusted successfully. New SL: {updated_trade.sl}, New TP: {updated_trade.tp}")
-                else:
-                    logging.info(f"Trade {trade_ticket} adjusted successfully, but couldn't retrieve updated values.")
+                self.record_modify(trade, result.request.sl, result.request.tp)
+                logging.info("Trade %s adjusted successfully. New SL: %s, New TP: %s", trade.ticket, trade.sl, trade.tp)
             else:
-                logging.error(f"Failed to adjust trade {trade_ticket}: {result.comment}")
+                logging.error("Failed to adjust trade %s: %s", trade.ticket, result.comment)
+
+    async def analyze_message(self, message_content, channel=None):
+            channel = channel or self.default_channel
+            cached = self.analysis_cache.get(message_content, channel.cache_scope)
+            if cached is not None:
+                logging.info("Analysis cache hit: %s", cached)
+                return cached
 
-    async def analyze_message(self, message_content):
             max_retries = 3
             retry_delay = 5  # seconds
 
             for attempt in range(max_retries):
                 try:
-                    prompt = self.generate_analysis_prompt(message_content)
-                    logging.info(f"Sending prompt to Together API: {prompt}")
+                    with latency.span('prompt'):
+                        prompt = self.generate_analysis_prompt(message_content, channel)
+                    logging.debug("Sending prompt to Together API: %s", prompt)
                     
-                    response = self.together_client.chat_completion(prompt)
-                    logging.info(f"Received raw response from Together API: {response}")
-                    
-                    if response is None:
-                        logging.info("Failed to get a valid response from Together API.")
-                        return {'action': None}
-
-                    logging.info(f"Response object type: {type(response)}")
-                    logging.info(f"Response attributes: {dir(response)}")
+                    # Small model first, escalated to the large one when its answer fails validation
+                    with latency.span('llm'):
+                        parsed_response = await self.model_router.complete_json(prompt)
 
-                    if not hasattr(response, 'choices') or not response.choices:
-                        logging.error("Response does not have 'choices' attribute or it's empty")
+                    if parsed_response is None:
+                        logging.info("Failed to get a valid response from Together API.")
                         return {'action': None}
 
-                    raw_response = response.choices[0].message.content.strip()
-                    logging.info(f"Raw response content: {raw_response}")
-                    
-                    clean_response = raw_response.strip().strip('```')
-                    logging.info(f"Cleaned AI Response: {clean_response}")
-
-                    try:
-                        parsed_response = json5.loads(clean_response)
-                        logging.info(f"Parsed JSON response: {parsed_response}")
-                        # Ensure that 'action' is always present in the response
-                        if 'action' not in parsed_response:
-                            parsed_response['action'] = None
-                        return parsed_response
-                    except ValueError as e:
-                        logging.error(f"Failed to decode JSON5: {e} - Cleaned Response: {clean_response}")
-                        return {'action': None}
+                    logging.info("Parsed JSON response: %s", parsed_response)
+                    self.analysis_cache.put(message_content, parsed_response, channel.cache_scope)
+                    return parsed_response
                 except Exception as e:
-                    logging.error(f"Error in analyze_message (attempt {attempt + 1}/{max_retries}): {e}", exc_info=True)
+                    logging.error("Error in analyze_message (attempt %s/%s): %s", attempt + 1, max_retries, e, exc_info=True)
                     if attempt < max_retries - 1:
                         await asyncio.sleep(retry_delay)
                     else:
                         logging.error("Max retries reached. Returning None.")
                         return {'action': None}
 
-    def generate_analysis_prompt(self, message_content):
+    def generate_analysis_prompt(self, message_content, channel=None):
+        hint = f"{channel.prompt_hint}\n" if channel is not None and channel.prompt_hint else ""
         return (
             "(YOU SPEAK ONLY JSON) You are an expert trading assistant. Analyze the following message and extract key information. "
             "Respond with a JSON object containing the following fields:\n"
@@ -183,123 +413,110 @@ class TelegramClientHandler(QObject):
                 "- stop_loss: stop loss price\n"
                 "- take_profit: take profit price(s) (can be a single number, an array, or an object with 'tp1', 'tp2', etc.)\n"
                 "- comment: any additional information\n\n"
+                f"{hint}"
                 f"Message:\n{message_content}\n"
             )
 
-    async def open_trades(self, analysis):
-        if self.opened_trades:
-            logging.info("Trades are already open. New trades will not be executed.")
+    async def open_trades(self, signal, channel=None):
+        channel = channel or self.default_channel
+        if signal.direction not in ("buy", "sell"):
+            # build_trade_request would otherwise turn anything but "buy" into a sell
+            logging.error("Refusing to open trades for %s without a direction", signal.symbol)
             return
 
-        symbol_info = self.get_symbol_info(analysis['symbol'])
+        symbol_info = await self.mt5.resolve_symbol(signal.symbol)
         if not symbol_info:
-            logging.error(f"Failed to get symbol info for {analysis['symbol']}")
+            logging.error("Failed to get symbol info for %s", signal.symbol)
             return
 
-        current_price = symbol_info.ask if analysis['direction'] == "buy" else symbol_info.bid
+        if self.symbol_trades(channel, symbol_info.name):
+            logging.info("Trades are already open on %s. New trades will not be executed.", symbol_info.name)
+            return
 
-        logging.info(f"Attempting to open {analysis['direction']} trade for {symbol_info.name} at {current_price}")
+        tick = self.mt5_service.peek_tick(symbol_info.name) or await self.mt5.get_tick(symbol_info.name)
+        if tick is None:
+            logging.error("Failed to get current price for %s", symbol_info.name)
+            return
 
-        for i in range(4):
-            result = self.execute_trade(analysis['direction'], symbol_info.name, current_price)
-            if result:
-                self.opened_trades.append(result.order)  # Store the trade ticket
-                logging.info(f"Trade {i+1}/4: {analysis['direction']} {symbol_info.name} executed successfully at {current_price}.")
+        current_price = tick.ask if signal.direction == "buy" else tick.bid
+
+        logging.info("Attempting to open %s trade for %s at %s", signal.direction, symbol_info.name, current_price)
+
+        signal_id = signal.signal_id
+        requests = [self.build_trade_request(signal.direction, symbol_info.name, current_price, channel.magic) for _ in range(TRADE_LEGS)]
+        for request in requests:
+            self.journal('order_request', signal_id=signal_id, request=request)
+        report = await self.execution_engine.submit_legs(requests)
+
+        opened = 0
+        for i, result in enumerate(report.results):
+            if self.check_trade_result(result):
+                opened += 1
+                self.positions.add(PositionRecord(
+                    result.order, symbol_info.name, requests[i]["type"], result.volume, result.price,
+                    magic=requests[i]["magic"], signal_id=signal_id,
+                    opened_version=self.mt5_service.snapshot_version,
+                ))
+                self.journal('fill', signal_id=signal_id, ticket=result.order, symbol=symbol_info.name,
+                             type=requests[i]["type"], volume=result.volume, price_open=result.price,
+                             magic=requests[i]["magic"])
+                logging.info("Trade %s/%s: %s %s executed successfully at %s.", i + 1, TRADE_LEGS, signal.direction, symbol_info.name, result.price)
             else:
-                logging.warning(f"Trade {i+1}/4: Failed to execute trade. Check if auto-trading is enabled in MetaTrader 5.")
+                logging.warning("Trade %s/%s: Failed to execute trade. Check if auto-trading is enabled in MetaTrader 5.", i + 1, TRADE_LEGS)
 
-        if not self.opened_trades:
+        if not opened:
             logging.error("No trades were opened. Please check your MetaTrader 5 settings and ensure auto-trading is enabled.")
         else:
-            logging.info(f"Successfully opened {len(self.opened_trades)} out of 4 attempted trades.")
-
-    def get_symbol_info(self, symbol):
-        possible_symbols = [symbol, f"{symbol}.sml", symbol.upper()]
-        symbol_info = next((self.mt5_service.get_symbol_info(s) for s in possible_symbols if self.mt5_service.get_symbol_info(s)), None)
-
-        if not symbol_info:
-            logging.info(f"Failed to get symbol info for {symbol}. Tried symbols: {', '.join(possible_symbols)}")
-        return symbol_info
+            logging.info("Successfully opened %s out of %s attempted trades in %.1f ms (fill-price spread: %s).", opened, TRADE_LEGS, report.elapsed * 1000, report.price_spread)
 
-    def execute_trade(self, action, symbol, price):
+    def build_trade_request(self, action, symbol, price, magic=DEFAULT_MAGIC):
         request = {
             "action": self.mt5_service.TRADE_ACTION_DEAL,
             "symbol": symbol,
             "volume": 0.02,
             "type": self.mt5_service.ORDER_TYPE_BUY if action == "buy" else self.mt5_service.ORDER_TYPE_SELL,
             "price": price,
-            "magic": 234000,
+            "magic": magic,
             "comment": f"Auto trade: {action}",
             "type_time": self.mt5_service.ORDER_TIME_GTC
         }
-        result = self.mt5_service.send_order(request)
+        # Filling mode order_check accepted during warm-up, if there was one
+        filling = self.mt5_service.filling_modes.get(symbol)
+        if filling is not None:
+            request["type_filling"] = filling
+        return request
+
+    def check_trade_result(self, result):
         if result is None:
             logging.error("Failed to execute trade: No result returned")
-            return None
+            return False
         if result.retcode != self.mt5_service.TRADE_RETCODE_DONE:
-            logging.error(f"Failed to execute trade: {result.comment} (retcode: {result.retcode})")
-            return None
-        return result
+            logging.error("Failed to execute trade: %s (retcode: %s)", result.comment, result.retcode)
+            return False
+        return True
 
-    async def update_trades(self, analysis):
-        if not self.opened_trades:
+    async def update_trades(self, signal, trades):
+        if not trades:
             logging.info("No trades to update.")
             return
 
-        trade_data = await self.parse_trade_data(analysis)
-        if not trade_data:
+        if signal.stop_loss is None and not signal.take_profits:
+            logging.info("Update message carries no new SL/TP levels.")
             return
 
-        sl = trade_data.get("stop_loss")
-        tp = trade_data.get("take_profit")
-        tp1, tp2 = self.parse_take_profit(tp)
-
-        for trade in self.opened_trades:
-            self.update_trade_sl_tp(trade, sl, tp1, tp2)
-
-    async def parse_trade_data(self, analysis):
-        prompt = self.generate_ai_prompt(analysis)
-        response = self.together_client.chat_completion(prompt)
-        if response is None:
-            logging.info("Failed to get a valid response from Together API.")
-            return None
-
-        raw_response = response.choices[0].message.content.strip()
-        clean_response = raw_response.strip().strip('```')
-        logging.info(f"Cleaned AI Response: {clean_response}")
-
-        try:
-            return json5.loads(clean_response)
-        except ValueError as e:
-            logging.info(f"Failed to decode JSON5: {e} - Cleaned Response: {clean_response}")
-            return None
-
-    def generate_ai_prompt(self, analysis):
-        return (
-            "You are a JSON writer expert. You will receive messages about trading and your role is to extract the key information and "
-            "structure it into a JSON format (YOU SPEAK ONLY JSON).\n\n"
-            "Here's how the JSON structure should look:\n\n"
-            "{\n"
-            "  \"action\": [\"buy\", \"sell\", \"close\", \"hold\", \"comment\"],\n"
-            "  \"symbol\": \"string\",\n"
-            "  \"entry\": {\n"
-            "    \"price\": [\"float\", \"null\"],\n"
-            "    \"range_start\": [\"float\", \"null\"],\n"
-            "    \"range_end\": [\"float\", \"null\"]\n"
-            "  },\n"
-            "  \"take_profit\": [\"float\", \"null\"],\n"
-            "  \"stop_loss\": [\"float\", \"null\"],\n"
-            "  \"comment\": \"string\"\n"
-            "}\n\n"
-            f"Message:\n{analysis}\n"
-        )
-
-    def parse_take_profit(self, tp):
-        if isinstance(tp, list):
-            return tp if len(tp) >= 2 else (tp[0], None)
-        return tp, None
+        tp1, tp2 = signal.take_profit_at(0), signal.take_profit_at(1)
+        for trade in trades:
+            # Levels the message doesn't mention stay as they are
+            sl = signal.stop_loss if signal.stop_loss is not None else trade.sl
+            tp = tp1 if trade.volume == 0.02 else tp2
+            if tp is None:
+                tp = trade.tp
+            if sl == trade.sl and tp == trade.tp:
+                logging.info("Trade %s already has SL %s / TP %s, nothing to update.", trade.ticket, sl, tp)
+                continue
+            await self.update_trade_sl_tp(trade, sl, tp)
 
-    def update_trade_sl_tp(self, trade, sl, tp1, tp2):
+    async def update_trade_sl_tp(self, trade, sl, tp):
         request = {
             "action": self.mt5_service.TRADE_ACTION_SLTP,
             "symbol": trade.symbol,
@@ -307,67 +524,43 @@ class TelegramClientHandler(QObject):
             "type": trade.type,
             "position": trade.ticket,
             "sl": sl,
-            "tp": tp1 if trade.volume == 0.02 else tp2,
+            "tp": tp,
             "deviation": 20,
-            "magic": 234000,
+            "magic": trade.magic,
             "comment": "Update SL/TP",
         }
 
-        result = self.mt5_service.send_order(request)
+        result = await self.mt5.send_order(request)
 
         if result and result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
-            logging.info(f"Trade updated successfully with SL/TP for {trade.symbol}.")
+            self.record_modify(trade, request["sl"], request["tp"])
+            logging.info("Trade updated successfully with SL/TP for %s.", trade.symbol)
         else:
-            logging.info(f"Failed to update trade: {result.comment}")
+            logging.info("Failed to update trade: %s", result.comment if result else 'Unknown error')
 
-    async def handle_breakeven(self):
-        if not self.opened_trades:
+    async def handle_breakeven(self, trades):
+        if not trades:
             logging.info("No trades to adjust for breakeven.")
             return
 
         logging.info("Handling breakeven...")
         
         # If there are 2 or fewer trades, close all of them
-        if len(self.opened_trades) <= 2:
-            logging.info(f"Only {len(self.opened_trades)} trade(s) open. Closing all trades.")
-            for trade_ticket in self.opened_trades.copy():  # Use copy to avoid modifying list while iterating
-                trade = self.mt5_service.get_open_position(trade_ticket)
-                if trade is None:
-                    logging.error(f"Failed to retrieve trade information for ticket {trade_ticket}")
-                    continue
-
-                result = self.mt5_service.close_position(trade_ticket, trade.volume)
-
-                if result and result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
-                    self.opened_trades.remove(trade_ticket)
-                    logging.info(f"Trade closed successfully for breakeven: {trade.symbol}.")
-                else:
-                    logging.error(f"Failed to close trade for breakeven: {result.comment if result else 'Unknown error'}")
+        if len(trades) <= 2:
+            logging.info("Only %s trade(s) open. Closing all trades.", len(trades))
+            for trade in trades:
+                await self.close_for_breakeven(trade)
             return  # Exit the method after closing all trades
 
         # If more than 2 trades are open, proceed with the breakeven logic
-        half_trades_to_close = self.opened_trades[:len(self.opened_trades) // 2]
-        half_trades_to_update = self.opened_trades[len(self.opened_trades) // 2:]
+        half_trades_to_close = trades[:len(trades) // 2]
+        remaining_trades = trades[len(trades) // 2:]
 
         # Close half of the trades
-        for trade_ticket in half_trades_to_close:
-            trade = self.mt5_service.get_open_position(trade_ticket)
-            if trade is None:
-                logging.error(f"Failed to retrieve trade information for ticket {trade_ticket}")
-                continue
-
-            result = self.mt5_service.close_position(trade_ticket, trade.volume)
-
-            if result and result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
-                self.opened_trades.remove(trade_ticket)
-                logging.info(f"Trade closed successfully for breakeven: {trade.symbol}.")
-            else:
-                logging.error(f"Failed to close trade for breakeven: {result.comment if result else 'Unknown error'}")
+        for trade in half_trades_to_close:
+            await self.close_for_breakeven(trade)
 
         # Calculate breakeven price for remaining trades
-        remaining_trades = [self.mt5_service.get_open_position(ticket) for ticket in half_trades_to_update]
-        remaining_trades = [trade for trade in remaining_trades if trade is not None]
-        
         if not remaining_trades:
             logging.error("No remaining trades to set breakeven.")
             return
@@ -376,18 +569,18 @@ class TelegramClientHandler(QObject):
         weighted_price_sum = sum(trade.price_open * trade.volume for trade in remaining_trades)
         breakeven_price = weighted_price_sum / total_volume
 
-        logging.info(f"Calculated breakeven price: {breakeven_price}")
+        logging.info("Calculated breakeven price: %s", breakeven_price)
 
         # Update remaining trades with breakeven stop loss
         for trade in remaining_trades:
-            current_price = self.mt5_service.get_current_price(trade.symbol)
+            current_price = await self.mt5.get_current_price(trade.symbol)
             if current_price is None:
-                logging.error(f"Failed to get current price for {trade.symbol}")
+                logging.error("Failed to get current price for %s", trade.symbol)
                 continue
 
-            symbol_info = self.mt5_service.get_symbol_info(trade.symbol)
+            symbol_info = await self.mt5.get_symbol_meta(trade.symbol)
             if symbol_info is None:
-                logging.error(f"Failed to get symbol info for {trade.symbol}")
+                logging.error("Failed to get symbol info for %s", trade.symbol)
                 continue
 
             # Add a small buffer to the breakeven price to avoid immediate stop-out
@@ -399,21 +592,31 @@ class TelegramClientHandler(QObject):
             else:  # SELL order
                 breakeven_sl = breakeven_price + buffer_price
 
-            result = self.mt5_service.modify_position(trade.ticket, sl=breakeven_sl)
+            result = await self.mt5.modify_position(trade.ticket, sl=breakeven_sl, tp=trade.tp, position=trade)
 
             if result and result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
-                logging.info(f"Trade {trade.ticket} updated to breakeven. New SL: {breakeven_sl}")
+                self.record_modify(trade, result.request.sl, result.request.tp)
+                logging.info("Trade %s updated to breakeven. New SL: %s", trade.ticket, breakeven_sl)
             else:
-                logging.error(f"Failed to set breakeven for trade {trade.ticket}: {result.comment if result else 'Unknown error'}")
+                logging.error("Failed to set breakeven for trade %s: %s", trade.ticket, result.comment if result else 'Unknown error')
+
+            logging.info("Trade %s - Current price: %s, Breakeven price: %s, New SL: %s", trade.ticket, current_price, breakeven_price, breakeven_sl)
 
-            logging.info(f"Trade {trade.ticket} - Current price: {current_price}, Breakeven price: {breakeven_price}, New SL: {breakeven_sl}")
+    async def close_for_breakeven(self, trade):
+        result = await self.mt5.close_position(trade.ticket, trade.volume, position=trade)
+
+        if result and result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
+            self.record_close(trade, 'breakeven')
+            logging.info("Trade closed successfully for breakeven: %s.", trade.symbol)
+        else:
+            logging.error("Failed to close trade for breakeven: %s", result.comment if result else 'Unknown error')
 
-    async def close_trades(self, analysis):
-        if not self.opened_trades:
+    async def close_trades(self, signal, trades):
+        if not trades:
             logging.info("No trades to close.")
             return
 
-        for trade in self.opened_trades:
+        for trade in trades:
             request = {
                 "action": self.mt5_service.TRADE_ACTION_DEAL,
                 "symbol": trade.symbol,
@@ -421,19 +624,61 @@ class TelegramClientHandler(QObject):
                 "type": self.mt5_service.ORDER_TYPE_SELL if trade.type == self.mt5_service.ORDER_TYPE_BUY else self.mt5_service.ORDER_TYPE_BUY,
                 "position": trade.ticket,
                 "deviation": 20,
-                "magic": 234000,
+                "magic": trade.magic,
                 "comment": "Close trade",
             }
 
-            result = self.mt5_service.send_order(request)
+            result = await self.mt5.send_order(request)
 
             if result and result.retcode == self.mt5_service.TRADE_RETCODE_DONE:
-                self.opened_trades.remove(trade)
-                logging.info(f"Trade closed successfully: {trade.symbol}.")
+                self.record_close(trade, 'close_trade')
+                logging.info("Trade closed successfully: %s.", trade.symbol)
             else:
-                logging.info(f"Failed to close trade: {result.comment}")
+                logging.info("Failed to close trade: %s", result.comment if result else 'Unknown error')
+
+    async def synchronize_trades(self):
+        snapshot = await self.mt5.snapshot_positions()
+        if snapshot is None:
+            logging.error("Failed to synchronize trades: could not retrieve open positions")
+            return
+        for ticket in self.positions.reconcile(snapshot.positions, snapshot.version):
+            self.journal('close', ticket=ticket, reason='reconcile')
+        logging.info("Synchronized trades. Current open trades: %s", self.positions.tickets())
+
+    def journal(self, kind, **fields):
+        if self.trade_journal is not None:
+            self.trade_journal.record(kind, **fields)
+
+    def record_modify(self, trade, sl, tp):
+        self.positions.update_levels(trade.ticket, sl, tp)
+        self.journal('modify', signal_id=trade.signal_id, ticket=trade.ticket, sl=sl, tp=tp)
+
+    def record_close(self, trade, reason):
+        self.positions.remove(trade.ticket)
+        self.journal('close', signal_id=trade.signal_id, ticket=trade.ticket, reason=reason)
+
+    async def recover_positions(self):
+        # Rebuilds the position book from the journal, keeping only tickets the
+        # terminal still reports as open.
+        if self.trade_journal is None:
+            return
+
+        journaled = await asyncio.get_running_loop().run_in_executor(None, self.trade_journal.replay_positions)
+        if not journaled:
+            return
+
+        snapshot = await self.mt5.snapshot_positions()
+        if snapshot is None:
+            logging.error("Cannot recover journaled positions: failed to retrieve open positions")
+            return
+
+        live = {position.ticket: position for position in snapshot.positions}
+        for ticket, fields in journaled.items():
+            position = live.get(ticket)
+            if position is None:
+                self.journal('close', signal_id=fields.get('signal_id'), ticket=ticket, reason='recovery')
+                continue
+            self.positions.add(PositionRecord.from_position(position, signal_id=fields.get('signal_id')))
+        self.positions.snapshot_version = snapshot.version
 
-    async def synchronize_trades(self, symbol):
-        mt5_open_trades = self.mt5_service.get_open_positions(symbol)
-        self.opened_trades = [trade for trade in self.opened_trades if trade in mt5_open_trades]
-        logging.info(f"Synchronized trades for {symbol}. Current open trades: {self.opened_trades}")
\ No newline at end of file
+        logging.info("Recovered %s open position(s) from the trade journal: %s", len(self.positions), self.positions.tickets())
@@ -1,44 +1,104 @@
 import sys
 import os
+import time
+
+# Taken before anything else is imported so the startup report covers imports too
+STARTED = time.perf_counter()
 
 # Add the project root directory to the Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
+import argparse
+import asyncio
 import logging
-from PySide6.QtWidgets import QApplication
-from services.mt5_service import MT5Service
-from services.together_client import TogetherClient
-from bot.telegram_client_handler import TelegramClientHandler
-from config.config import load_config
-from gui.main_app import MainApp
+import signal
+from utils.logger import setup_logger
+from utils.startup import StartupTimer, preload
+
+# Services, telethon, aiohttp and MetaTrader5 are imported in main() when
+# their subsystem starts, so --help and --gui don't pay for them
+
+
+async def run_service(telegram_handler):
+    # SIGINT/SIGTERM cancel the service so it drains its pipelines and closes
+    # its connections; Windows event loops have no signal handlers and fall
+    # back to KeyboardInterrupt.
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, task.cancel)
+        except NotImplementedError:
+            pass
+    try:
+        await telegram_handler.serve()
+    except asyncio.CancelledError:
+        logging.info("Shutdown requested.")
+
 
 def main():
-    logging.basicConfig(level=logging.INFO)
-    logging.info("Starting application...")
+    parser = argparse.ArgumentParser(description="Telegram signal trading bot.")
+    parser.add_argument("--gui", action="store_true", help="Open the desktop GUI instead of running headless")
+    args = parser.parse_args()
+
+    if args.gui:
+        # The GUI is an optional client; Qt is only imported when it is asked for
+        from gui.main_app import main as gui_main
+        return gui_main()
+
+    log_pipeline = setup_logger()
+    startup = StartupTimer(STARTED)
+    startup.mark("boot")
+    logging.info("Starting headless service...")
 
     # Load configuration
+    from config.config import load_config
     config = load_config()
+    startup.mark("config")
+
+    # The Telegram and LLM stacks import while the MT5 terminal handshake blocks
+    preload("telethon", "aiohttp", "json5")
 
     # Initialize services
+    from services.mt5_service import MT5Service
     mt5_service = MT5Service()
-    together_client = TogetherClient(api_key=config['TOGETHER_API_KEY'])
+    startup.mark("mt5")
+
+    from services.together_client import AsyncTogetherClient
+    from services.analysis_cache import AnalysisCache
+    from services.trade_journal import TradeJournal
+    from utils.latency import LatencyTracker
+    from bot.telegram_client_handler import TelegramClientHandler, ANALYSIS_PROMPT_VERSION
+    from bot.channels import load_channel_profiles
+
+    together_client = AsyncTogetherClient(api_key=config['TOGETHER_API_KEY'], stream=True)
+    analysis_cache = AnalysisCache(ANALYSIS_PROMPT_VERSION, db_path='analysis_cache.db')
+    trade_journal = TradeJournal('trade_journal.db')
+    latency_tracker = LatencyTracker()
+    latency_tracker.serve(port=9108)
+    latency_tracker.start_periodic_dump(60.0, path='latency_report.json')
 
     # Initialize Telegram client handler
     api_id = config['TELEGRAM_API_ID']
     api_hash = config['TELEGRAM_API_HASH']
     phone_number = config['TELEGRAM_PHONE_NUMBER']
-    source_channel_id = config['TELEGRAM_SOURCE_CHANNEL_ID']
-    telegram_handler = TelegramClientHandler(api_id, api_hash, phone_number, source_channel_id, mt5_service, together_client)
-
-    # Create and start the PySide6 application
-    app = QApplication(sys.argv)
-    main_window = MainApp()
-    # main_window.show()
-
-    # Start the Telegram client handler
-    telegram_handler.start()
+    channels = load_channel_profiles(config)
+    telegram_handler = TelegramClientHandler(api_id, api_hash, phone_number, channels, mt5_service, together_client, analysis_cache, trade_journal, latency_tracker, config.get('WARM_SYMBOLS'))
+    telegram_handler.add_ready_listener(startup.ready)
+    startup.mark("services")
 
-    sys.exit(app.exec())
+    # Ingestion, analysis and execution share the main thread's event loop
+    try:
+        asyncio.run(run_service(telegram_handler))
+    except KeyboardInterrupt:
+        logging.info("Shutdown requested.")
+    finally:
+        latency_tracker.stop()
+        trade_journal.close()
+        analysis_cache.close()
+        mt5_service.shutdown()
+        logging.info("Service stopped.")
+        log_pipeline.stop()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,108 @@
+import logging
+from collections import deque
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QComboBox, QHBoxLayout, QLineEdit, QPlainTextEdit, QPushButton, QVBoxLayout, QWidget
+from utils.custom_logging import QtLogBridge, QtLogHandler
+
+LEVELS = [("DEBUG", logging.DEBUG), ("INFO", logging.INFO), ("WARNING", logging.WARNING), ("ERROR", logging.ERROR)]
+
+
+class LogConsole(QWidget):
+    # Bounded log viewer. Records arrive in one batch per frame, the document
+    # keeps at most max_lines blocks (oldest dropped first), and the last
+    # max_lines records are retained so filters can be re-applied without
+    # touching the logging pipeline.
+
+    def __init__(self, max_lines=5000, frame_interval_ms=16, parent=None):
+        super().__init__(parent)
+        self.records = deque(maxlen=max_lines)
+        self.min_level = logging.INFO
+        self.logger_filter = ""
+
+        self.bridge = QtLogBridge(frame_interval_ms, max_buffer=max_lines, parent=self)
+        self.bridge.records_ready.connect(self.ingest)
+        self.handler = QtLogHandler(self.bridge)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        toolbar = QHBoxLayout()
+        self.level_combo = QComboBox()
+        for name, level in LEVELS:
+            self.level_combo.addItem(name, level)
+        self.level_combo.setCurrentIndex(1)
+        self.level_combo.currentIndexChanged.connect(self.on_filters_changed)
+        toolbar.addWidget(self.level_combo)
+
+        self.logger_input = QLineEdit()
+        self.logger_input.setPlaceholderText("Logger")
+        self.logger_input.editingFinished.connect(self.on_filters_changed)
+        toolbar.addWidget(self.logger_input)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search")
+        self.search_input.returnPressed.connect(self.find_next)
+        toolbar.addWidget(self.search_input)
+
+        previous_button = QPushButton("Prev")
+        previous_button.clicked.connect(self.find_previous)
+        toolbar.addWidget(previous_button)
+        next_button = QPushButton("Next")
+        next_button.clicked.connect(self.find_next)
+        toolbar.addWidget(next_button)
+        layout.addLayout(toolbar)
+
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setMaximumBlockCount(max_lines)
+        self.output.setUndoRedoEnabled(False)
+        layout.addWidget(self.output)
+
+    def accepts(self, record):
+        if record.levelno < self.min_level:
+            return False
+        return not self.logger_filter or record.name.startswith(self.logger_filter)
+
+    def ingest(self, batch):
+        self.records.extend(batch)
+        lines = [message for record, message in batch if self.accepts(record)]
+        if lines:
+            self.append_lines(lines)
+
+    def append_lines(self, lines):
+        scrollbar = self.output.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum() - 2
+        self.output.appendPlainText("\n".join(lines))
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def on_filters_changed(self):
+        self.min_level = self.level_combo.currentData()
+        self.logger_filter = self.logger_input.text().strip()
+        # Rebuild from the retained records only when a filter actually changes
+        self.output.clear()
+        lines = [message for record, message in self.records if self.accepts(record)]
+        if lines:
+            self.append_lines(lines)
+
+    def find_next(self):
+        self.find(QTextDocument.FindFlags())
+
+    def find_previous(self):
+        self.find(QTextDocument.FindBackward)
+
+    def find(self, flags):
+        # Searches from the current cursor, wrapping around once, instead of
+        # scanning the whole document on every query
+        text = self.search_input.text()
+        if not text:
+            return
+        document = self.output.document()
+        cursor = document.find(text, self.output.textCursor(), flags)
+        if cursor.isNull():
+            start = QTextCursor(document)
+            if flags & QTextDocument.FindBackward:
+                start.movePosition(QTextCursor.End)
+            cursor = document.find(text, start, flags)
+        if not cursor.isNull():
+            self.output.setTextCursor(cursor)
@@ -1,20 +1,22 @@
 import sys
 import os
-import requests
 from PySide6.QtWidgets import QTextBrowser
 from PySide6.QtCore import QRunnable, Slot, Signal, QObject, QThreadPool
 
 # Add the root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from bot.telegram_client_handler import TelegramClientHandler
-from config.config import load_config
-from services.mt5_service import MT5Service
-from services.together_client import TogetherClient
+# The bot, its services and their SDKs are imported in run_bot when the bot is started
+from utils.logger import setup_logger
+from utils.startup import StartupTimer, preload
+from gui.log_console import LogConsole
+from gui.mt5_bridge import MT5Bridge
+from gui.refresh import NewsFeed, RefreshScheduler, WorkerSignals
+from gui.positions_model import PositionsTableModel, PositionsFilterProxy
 import threading
 import json
 import logging
-from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QPlainTextEdit, QLineEdit, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QHBoxLayout, QStackedWidget, QRadioButton, QFrame
+from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QLineEdit, QMessageBox, QTableView, QHeaderView, QHBoxLayout, QStackedWidget, QRadioButton, QFrame
 from PySide6.QtCore import QTimer, Qt, QPropertyAnimation, QEasingCurve
 from PySide6.QtGui import QFont, QColor, QPalette
 import asyncio
@@ -22,22 +24,9 @@ from concurrent.futures import ThreadPoolExecutor
 import traceback
 
 
-class QTextEditLogger(logging.Handler):
-    def __init__(self, text_widget):
-        super().__init__()
-        self.widget = text_widget
-
-    def emit(self, record):
-        msg = self.format(record)
-        self.widget.appendPlainText(msg)
-        self.widget.verticalScrollBar().setValue(self.widget.verticalScrollBar().maximum())
-
-
-class WorkerSignals(QObject):
-    finished = Signal()
-    error = Signal(tuple)
-    result = Signal(object)
-    progress = Signal(int)
+class LatencySignals(QObject):
+    # Carries per-signal latency breakdowns from the bot loop to the GUI thread
+    trace_finished = Signal(object)
 
 class BotWorker(QRunnable):
     def __init__(self, main_app):
@@ -135,10 +124,36 @@ class MainApp(QMainWindow):
         self.chat_panel.setAlignment(Qt.AlignTop)
         left_layout.addWidget(self.chat_panel)
 
+        # Per-signal latency breakdown of the last processed message
+        self.latency_label = QLabel("Signal latency: waiting for first signal...")
+        self.latency_label.setFrameStyle(QFrame.Panel | QFrame.Sunken)
+        self.latency_label.setAlignment(Qt.AlignTop)
+        self.latency_label.setStyleSheet("font-family: Consolas, monospace; font-size: 12px; padding: 5px;")
+        left_layout.addWidget(self.latency_label)
+        self.latency_signals = LatencySignals()
+        self.latency_signals.trace_finished.connect(self.show_latency)
+
         # Trades monitoring table with a modern design (Third panel)
-        self.trades_table = QTableWidget()
-        self.trades_table.setColumnCount(5)
-        self.trades_table.setHorizontalHeaderLabels(["Symbol", "Type", "Volume", "Price", "Profit"])
+        # Positions are diffed into a model, so refreshes only repaint changed cells
+        self.positions_model = PositionsTableModel(self)
+        self.positions_proxy = PositionsFilterProxy(self)
+        self.positions_proxy.setSourceModel(self.positions_model)
+
+        filter_layout = QHBoxLayout()
+        self.symbol_filter_input = QLineEdit()
+        self.symbol_filter_input.setPlaceholderText("Filter by symbol")
+        self.symbol_filter_input.textChanged.connect(self.positions_proxy.set_symbol_filter)
+        filter_layout.addWidget(self.symbol_filter_input)
+        self.magic_filter_input = QLineEdit()
+        self.magic_filter_input.setPlaceholderText("Filter by magic")
+        self.magic_filter_input.textChanged.connect(self.positions_proxy.set_magic_filter)
+        filter_layout.addWidget(self.magic_filter_input)
+        left_layout.addLayout(filter_layout)
+
+        self.trades_table = QTableView()
+        self.trades_table.setModel(self.positions_proxy)
+        self.trades_table.setSortingEnabled(True)
+        self.trades_table.verticalHeader().setVisible(False)
         self.trades_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.trades_table.setStyleSheet("""
             QHeaderView::section {
@@ -147,11 +162,11 @@ class MainApp(QMainWindow):
                 font-weight: bold;
                 height: 30px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #F4F6F7;
                 border-radius: 5px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
         """)
@@ -167,9 +182,8 @@ class MainApp(QMainWindow):
         self.status_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2E86C1;")
         right_layout.addWidget(self.status_label)
 
-        self.log_output = QPlainTextEdit()
-        self.log_output.setReadOnly(True)
-        self.log_output.setStyleSheet("""
+        self.log_console = LogConsole(max_lines=5000)
+        self.log_console.output.setStyleSheet("""
             background-color: #1E1E1E;
             color: #FFFFFF;
             font-family: Consolas, monospace;
@@ -177,7 +191,7 @@ class MainApp(QMainWindow):
             padding: 10px;
             border-radius: 5px;
         """)
-        right_layout.addWidget(self.log_output)
+        right_layout.addWidget(self.log_console)
 
         input_layout = QHBoxLayout()
         self.api_key_input = QLineEdit()
@@ -220,11 +234,7 @@ class MainApp(QMainWindow):
         # Set up a timer for updating the trades table and account info
         self.trade_update_timer = QTimer(self)
         self.trade_update_timer.timeout.connect(self.update_trades_table)
-        # self.trade_update_timer.start(5000)  # Update every 5 seconds
-
-        self.account_update_timer = QTimer(self)
-        self.account_update_timer.timeout.connect(self.update_account_info)
-        # self.account_update_timer.start(5000)  # Update every 5 seconds
+        self.trade_update_timer.start(500)  # Snapshots are fetched off the GUI thread
 
         # Add animations
         self.start_animation = QPropertyAnimation(self.start_button, b"geometry")
@@ -240,42 +250,88 @@ class MainApp(QMainWindow):
         self.news_panel.setOpenExternalLinks(True)
         self.stacked_widget.addWidget(self.news_panel)
 
-        # Add a timer to update news periodically
-        self.news_update_timer = QTimer(self)
-        self.news_update_timer.timeout.connect(self.update_news)
-        # self.news_update_timer.start(600000)  # Update every 10 minutes
-
-        # Call update_news immediately to load news on startup
-        # self.update_news()
-
         # Initialize mt5_service
         self.mt5_service = None
+        self.mt5_bridge = None
+        self.positions_request = None
 
         self.threadpool = QThreadPool()
 
+        # Account info and news are fetched on the thread pool; only changed values reach the widgets
+        self.news_feed = NewsFeed('https://newsapi.org/v2/top-headlines?country=us&category=business&apiKey=8575387f43dd4527bc2a9a0c3201bf68')
+        self.refresh_scheduler = RefreshScheduler(self.threadpool, self)
+        self.refresh_scheduler.add_job('account_info', self.fetch_account_info, 5000)  # Update every 5 seconds
+        self.refresh_scheduler.add_job('news', self.news_feed.fetch, 600000)  # Update every 10 minutes
+        self.refresh_scheduler.updated.connect(self.on_refresh_result)
+        self.refresh_scheduler.failed.connect(self.on_refresh_error)
+        self.refresh_scheduler.start()
+
     def switch_panels(self):
         if self.panel_switcher.isChecked():
             self.stacked_widget.setCurrentIndex(1)  # Show news panel
-            # self.update_news()  # Fetch news when switching to the news panel
+            self.update_news()  # Served from the news cache unless it has expired
         else:
             self.stacked_widget.setCurrentIndex(0)  # Show account info panel
 
+    def get_mt5_bridge(self):
+        if self.mt5_bridge is None and self.mt5_service is not None:
+            self.mt5_bridge = MT5Bridge(self.mt5_service, self)
+            self.mt5_bridge.result_ready.connect(self.on_mt5_result)
+            self.mt5_bridge.error.connect(self.on_mt5_error)
+        return self.mt5_bridge
+
+    def on_mt5_result(self, tag, result):
+        if tag == 'open_positions':
+            self.apply_trades(result)
+
+    def on_mt5_error(self, tag, message):
+        logging.error("MT5 request '%s' failed: %s", tag, message)
+
+    def on_refresh_result(self, tag, result):
+        if tag == 'account_info':
+            self.apply_account_info(result)
+        elif tag == 'news':
+            self.apply_news(result)
+
+    def on_refresh_error(self, tag, message):
+        logging.error("Refreshing %s failed: %s", tag, message)
+        if tag == 'news':
+            self.news_panel.setPlainText(f"Error fetching news: {message}")
+
     def update_account_info(self):
-        if self.mt5_service is not None:
-            account_info = self.mt5_service.get_account_info()
-            if account_info:
-                self.balance_label.setText(f"Balance: {account_info['balance']}")
-                self.equity_label.setText(f"Equity: {account_info['equity']}")
-                self.margin_label.setText(f"Margin: {account_info['margin']}")
-                self.free_margin_label.setText(f"Free Margin: {account_info['free_margin']}")
-            else:
-                logging.error("Failed to update account info.")
+        self.refresh_scheduler.refresh('account_info')
+
+    def fetch_account_info(self):
+        # Runs on the thread pool; the call itself is served by the MT5 gateway thread
+        if self.mt5_service is None:
+            return None
+        return self.mt5_service.get_account_info()
+
+    def apply_account_info(self, account_info):
+        if account_info:
+            self.set_label_text(self.balance_label, f"Balance: {account_info['balance']}")
+            self.set_label_text(self.equity_label, f"Equity: {account_info['equity']}")
+            self.set_label_text(self.margin_label, f"Margin: {account_info['margin']}")
+            self.set_label_text(self.free_margin_label, f"Free Margin: {account_info['free_margin']}")
+        else:
+            logging.error("Failed to update account info.")
+
+    @staticmethod
+    def set_label_text(label, text):
+        if label.text() != text:
+            label.setText(text)
+
+    def show_latency(self, breakdown):
+        lines = [f"Signal {breakdown['signal_id']}: {breakdown['total_ms']:.1f} ms total"]
+        for stage, duration_ms in breakdown['spans']:
+            lines.append(f"  {stage:<12} {duration_ms:9.2f} ms")
+        self.latency_label.setText("\n".join(lines))
 
     def setup_logging(self):
-        log_handler = QTextEditLogger(self.log_output)
+        # Records reach the console in one batch per frame from the logging listener thread
+        log_handler = self.log_console.handler
         log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        logging.getLogger().addHandler(log_handler)
-        logging.getLogger().setLevel(logging.INFO)
+        setup_logger().add_handler(log_handler)
 
     def on_start_button_clicked(self):
         self.status_label.setText("Status: Running")
@@ -300,7 +356,7 @@ class MainApp(QMainWindow):
 
     def bot_error(self, error_tuple):
         error_type, error_value, error_traceback = error_tuple
-        logging.error(f"Bot error: {error_type.__name__}: {error_value}")
+        logging.error("Bot error: %s: %s", error_type.__name__, error_value)
         self.status_label.setText("Status: Error")
         self.status_label.setStyleSheet("color: #CB4335;")
         self.start_button.setEnabled(True)
@@ -315,53 +371,77 @@ class MainApp(QMainWindow):
         # You may need to implement a way to interrupt the bot's execution
 
     def run_bot(self):
+        startup = StartupTimer()
         try:
             logging.info("Loading configuration...")
+            from config.config import load_config
             config = load_config()
             logging.info("Configuration loaded successfully.")
+            startup.mark("config")
+
+            logging.info("Configuration keys: %s", ', '.join(config.keys()))
 
-            logging.info(f"Configuration keys: {', '.join(config.keys())}")
+            preload("telethon", "aiohttp", "json5")
 
             logging.info("Initializing MT5 service...")
+            from services.mt5_service import MT5Service
             self.mt5_service = MT5Service()
             logging.info("MT5 service initialized.")
+            startup.mark("mt5")
+
+            from services.together_client import AsyncTogetherClient
+            from services.analysis_cache import AnalysisCache
+            from services.trade_journal import TradeJournal
+            from utils.latency import LatencyTracker
+            from bot.telegram_client_handler import TelegramClientHandler, ANALYSIS_PROMPT_VERSION
+            from bot.channels import load_channel_profiles
 
             logging.info("Initializing Together client...")
             try:
-                together_client = TogetherClient(api_key=config.get('TOGETHER_API_KEY'))
+                together_client = AsyncTogetherClient(api_key=config.get('TOGETHER_API_KEY'), stream=True)
                 logging.info("Together client initialized.")
             except Exception as e:
-                logging.error(f"Error initializing Together client: {e}", exc_info=True)
+                logging.error("Error initializing Together client: %s", e, exc_info=True)
                 raise
 
+            latency_tracker = LatencyTracker()
+            latency_tracker.add_listener(self.latency_signals.trace_finished.emit)
+            latency_tracker.start_periodic_dump(60.0)
+
             logging.info("Initializing Telegram client handler...")
             try:
                 client_handler = TelegramClientHandler(
                     api_id=config.get('TELEGRAM_API_ID'),
                     api_hash=config.get('TELEGRAM_API_HASH'),
-                    source_channel_id=config.get('TELEGRAM_SOURCE_CHANNEL_ID'),
-                    destination_chat_id=config.get('TELEGRAM_DESTINATION_CHAT_ID'),
+                    phone_number=config.get('TELEGRAM_PHONE_NUMBER'),
+                    channels=load_channel_profiles(config),
                     mt5_service=self.mt5_service,
-                    together_client=together_client
+                    together_client=together_client,
+                    analysis_cache=AnalysisCache(ANALYSIS_PROMPT_VERSION, db_path='analysis_cache.db'),
+                    trade_journal=TradeJournal('trade_journal.db'),
+                    latency_tracker=latency_tracker,
+                    warm_symbols=config.get('WARM_SYMBOLS'),
                 )
+                client_handler.add_ready_listener(startup.ready)
                 logging.info("Telegram client handler initialized.")
+                startup.mark("services")
             except Exception as e:
-                logging.error(f"Error initializing Telegram client handler: {e}", exc_info=True)
+                logging.error("Error initializing Telegram client handler: %s", e, exc_info=True)
                 raise
 
             logging.info("Starting Telegram client handler...")
             try:
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
-                loop.run_until_complete(client_handler.run())
+                loop.run_until_complete(client_handler.serve())
             except Exception as e:
-                logging.error(f"Error running Telegram client handler: {e}", exc_info=True)
+                logging.error("Error running Telegram client handler: %s", e, exc_info=True)
                 raise
             finally:
                 loop.close()
 
         except Exception as e:
-            logging.error(f"Error in run_bot: {e}", exc_info=True)
+            logging.error("Error in run_bot: %s", e, exc_info=True)
             self.status_label.setText("Status: Error")
             self.status_label.setStyleSheet("color: #CB4335;")
             self.start_button.setEnabled(True)
@@ -369,15 +449,16 @@ class MainApp(QMainWindow):
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
 
     def update_trades_table(self):
-        if self.mt5_service is not None:
-            trades = self.mt5_service.get_open_positions()
-            self.trades_table.setRowCount(len(trades))
-            for i, trade in enumerate(trades):
-                self.trades_table.setItem(i, 0, QTableWidgetItem(trade['symbol']))
-                self.trades_table.setItem(i, 1, QTableWidgetItem(trade['type']))
-                self.trades_table.setItem(i, 2, QTableWidgetItem(str(trade['volume'])))
-                self.trades_table.setItem(i, 3, QTableWidgetItem(str(trade['price'])))
-                self.trades_table.setItem(i, 4, QTableWidgetItem(str(trade['profit'])))
+        bridge = self.get_mt5_bridge()
+        if bridge is None:
+            return
+        # Skip this tick if the previous snapshot is still in flight
+        if self.positions_request is not None and not self.positions_request.done():
+            return
+        self.positions_request = bridge.request('open_positions', self.mt5_service.snapshot_positions)
+
+    def apply_trades(self, snapshot):
+        self.positions_model.apply_snapshot(snapshot)
 
     def save_config(self):
         config = {
@@ -417,46 +498,21 @@ class MainApp(QMainWindow):
         QTimer.singleShot(200, self.start_animation.start)
 
     def update_news(self):
-        logging.info("Updating news...")
-        try:
-            url = 'https://newsapi.org/v2/top-headlines?country=us&category=business&apiKey=8575387f43dd4527bc2a9a0c3201bf68'
-            logging.info(f"Fetching news from URL: {url}")
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            news_data = response.json()
-
-            # logging.info(f"Received response: {news_data}")
-
-            if news_data['status'] == 'ok':
-                news_html = "<h2>Today's Business News:</h2>"
-                for article in news_data['articles'][:5]:  # Display top 5 articles
-                    news_html += f"<h3><a href='{article['url']}'>{article['title']}</a></h3>"
-                    if article['description']:
-                        news_html += f"<p>{article['description']}</p>"
-                    news_html += "<hr>"
-
-                self.news_panel.setHtml(news_html)
-                logging.info("News updated successfully")
-                # logging.info(f"News HTML: {news_html}")  # Log the HTML content
-            else:
-                error_message = f"Failed to fetch news. Status: {news_data['status']}"
-                logging.error(error_message)
-                self.news_panel.setPlainText(error_message)
-        except requests.RequestException as e:
-            error_message = f"Error fetching news: {e}"
-            logging.error(error_message)
-            self.news_panel.setPlainText(error_message)
-        except Exception as e:
-            error_message = f"Unexpected error updating news: {e}"
-            logging.error(error_message)
-            self.news_panel.setPlainText(error_message)
-
-        # Force update of the news panel
-        self.news_panel.update()
-
-if __name__ == '__main__':
+        self.refresh_scheduler.refresh('news')
+
+    def apply_news(self, articles):
+        news_html = "<h2>Today's Business News:</h2>"
+        for url, title, description in articles:
+            news_html += f"<h3><a href='{url}'>{title}</a></h3>"
+            if description:
+                news_html += f"<p>{description}</p>"
+            news_html += "<hr>"
+        self.news_panel.setHtml(news_html)
+        logging.info("News updated successfully")
+
+def main():
     try:
-        logging.basicConfig(level=logging.INFO)
+        setup_logger()
         logging.info("Starting application...")
         app = QApplication(sys.argv)
         app.setStyle('Fusion')  # Set Fusion style for a modern look
@@ -464,6 +520,9 @@ if __name__ == '__main__':
         main_window.show()
         sys.exit(app.exec())
     except Exception as e:
-        logging.error(f"Main application error: {e}")
-        logging.error(f"Traceback: {traceback.format_exc()}")
-        QMessageBox.critical(None, "Critical Error", f"A critical error occurred: {str(e)}\n\nPlease check the logs for more details.")
\ No newline at end of file
+        logging.error("Main application error: %s", e)
+        logging.error("Traceback: %s", traceback.format_exc())
+        QMessageBox.critical(None, "Critical Error", f"A critical error occurred: {str(e)}\n\nPlease check the logs for more details.")
+
+if __name__ == '__main__':
+    main()
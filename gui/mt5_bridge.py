@@ -0,0 +1,27 @@
+from PySide6.QtCore import QObject, Signal
+
+
+class MT5Bridge(QObject):
+    # Qt front-end for the MT5 gateway. Requests are queued on the gateway
+    # thread and the outcome is delivered back to the GUI thread through
+    # queued signals, so widgets never wait on terminal I/O.
+    result_ready = Signal(str, object)
+    error = Signal(str, str)
+
+    def __init__(self, mt5_service, parent=None):
+        super().__init__(parent)
+        self.mt5_service = mt5_service
+
+    def request(self, tag, func, *args, **kwargs):
+        future = self.mt5_service.gateway.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda f: self.deliver(tag, f))
+        return future
+
+    def deliver(self, tag, future):
+        if future.cancelled():
+            return
+        exception = future.exception()
+        if exception is not None:
+            self.error.emit(tag, str(exception))
+        else:
+            self.result_ready.emit(tag, future.result())
@@ -0,0 +1,123 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PySide6.QtGui import QColor
+
+# (header, PositionRow field)
+COLUMNS = [
+    ("Ticket", "ticket"),
+    ("Symbol", "symbol"),
+    ("Type", "type"),
+    ("Volume", "volume"),
+    ("Open Price", "price_open"),
+    ("Price", "price_current"),
+    ("Profit", "profit"),
+    ("Magic", "magic"),
+]
+FIELDS = [field for _, field in COLUMNS]
+SYMBOL_COLUMN = FIELDS.index("symbol")
+PROFIT_COLUMN = FIELDS.index("profit")
+
+# MT5 POSITION_TYPE_BUY
+POSITION_TYPE_BUY = 0
+
+
+class PositionsTableModel(QAbstractTableModel):
+    # Holds the latest PositionSnapshot rows. apply_snapshot() diffs against
+    # the current rows and only signals inserted/removed rows and the changed
+    # cell ranges, so the view repaints what actually moved.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.version = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = getattr(self.rows[index.row()], FIELDS[index.column()])
+
+        if role == Qt.DisplayRole:
+            if FIELDS[index.column()] == "type":
+                return "Buy" if value == POSITION_TYPE_BUY else "Sell"
+            return str(value)
+        if role == Qt.UserRole:
+            # Raw value for sorting and filtering
+            return value
+        if role == Qt.ForegroundRole and index.column() == PROFIT_COLUMN:
+            return QColor("#1E8449") if value >= 0 else QColor("#CB4335")
+        if role == Qt.TextAlignmentRole and index.column() != SYMBOL_COLUMN:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def apply_snapshot(self, snapshot):
+        if snapshot is None or snapshot.version <= self.version:
+            return
+        self.version = snapshot.version
+        live = {position.ticket: position for position in snapshot.positions}
+
+        # Remove closed positions, walking backwards so row numbers stay valid
+        row = len(self.rows) - 1
+        while row >= 0:
+            if self.rows[row].ticket in live:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self.rows[row].ticket not in live:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self.rows[row + 1:last + 1]
+            self.endRemoveRows()
+
+        # Update surviving rows in place, one dataChanged covering the changed columns
+        for row, current in enumerate(self.rows):
+            updated = live.pop(current.ticket)
+            if updated == current:
+                continue
+            changed = [column for column, field in enumerate(FIELDS) if getattr(updated, field) != getattr(current, field)]
+            self.rows[row] = updated
+            if not changed:
+                continue
+            self.dataChanged.emit(self.index(row, changed[0]), self.index(row, changed[-1]))
+
+        # Append newly opened positions
+        if live:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(live) - 1)
+            self.rows.extend(live.values())
+            self.endInsertRows()
+
+
+class PositionsFilterProxy(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.symbol_filter = ""
+        self.magic_filter = None
+        self.setSortRole(Qt.UserRole)
+        self.setDynamicSortFilter(True)
+
+    def set_symbol_filter(self, text):
+        self.symbol_filter = text.strip().upper()
+        self.invalidateFilter()
+
+    def set_magic_filter(self, text):
+        text = text.strip()
+        self.magic_filter = int(text) if text.isdigit() else None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        row = self.sourceModel().rows[source_row]
+        if self.symbol_filter and self.symbol_filter not in row.symbol.upper():
+            return False
+        if self.magic_filter is not None and row.magic != self.magic_filter:
+            return False
+        return True
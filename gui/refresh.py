@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal, Slot
+
+
+class WorkerSignals(QObject):
+    finished = Signal()
+    error = Signal(tuple)
+    result = Signal(object)
+    progress = Signal(int)
+
+
+class RefreshWorker(QRunnable):
+    def __init__(self, fetch):
+        super().__init__()
+        self.fetch = fetch
+        self.signals = WorkerSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            self.signals.result.emit(self.fetch())
+        except Exception as e:
+            self.signals.error.emit((type(e), str(e), e.__traceback__))
+        finally:
+            self.signals.finished.emit()
+
+
+class RefreshScheduler(QObject):
+    # Runs periodic fetches on a QThreadPool and hands results back to the GUI
+    # thread. A job that is still running when its next refresh is due is not
+    # started again, and a result equal to the last one delivered is dropped,
+    # so widgets only hear about values that actually changed.
+    updated = Signal(str, object)
+    failed = Signal(str, str)
+
+    def __init__(self, threadpool=None, parent=None):
+        super().__init__(parent)
+        self.threadpool = threadpool or QThreadPool.globalInstance()
+        self.jobs = {}
+        self.timers = {}
+        self.in_flight = set()
+        self.last_values = {}
+
+    def add_job(self, tag, fetch, interval_ms):
+        self.jobs[tag] = fetch
+        timer = QTimer(self)
+        timer.setInterval(interval_ms)
+        timer.timeout.connect(lambda: self.refresh(tag))
+        self.timers[tag] = timer
+
+    def start(self, refresh_now=True):
+        for tag, timer in self.timers.items():
+            timer.start()
+            if refresh_now:
+                self.refresh(tag)
+
+    def stop(self):
+        for timer in self.timers.values():
+            timer.stop()
+
+    def refresh(self, tag):
+        if tag in self.in_flight:
+            return False
+        self.in_flight.add(tag)
+        worker = RefreshWorker(self.jobs[tag])
+        worker.signals.result.connect(lambda value: self.deliver(tag, value))
+        worker.signals.error.connect(lambda error: self.failed.emit(tag, error[1]))
+        worker.signals.finished.connect(lambda: self.in_flight.discard(tag))
+        self.threadpool.start(worker)
+        return True
+
+    def deliver(self, tag, value):
+        if value is None or self.last_values.get(tag) == value:
+            return
+        self.last_values[tag] = value
+        self.updated.emit(tag, value)
+
+
+class NewsFeed:
+    # Fetches headlines with a TTL and conditional requests: inside the TTL
+    # the cached articles are returned without touching the network, after it
+    # the stored ETag lets the server answer 304 Not Modified.
+
+    def __init__(self, url, ttl=600, timeout=10.0, max_articles=5):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_articles = max_articles
+        self.session = None
+        self.lock = threading.Lock()
+        self.etag = None
+        self.articles = None
+        self.fetched_at = 0.0
+
+    def fetch(self):
+        with self.lock:
+            if self.articles is not None and time.monotonic() - self.fetched_at < self.ttl:
+                return self.articles
+
+            if self.session is None:
+                # requests is imported on the first fetch, on the worker thread
+                import requests
+                self.session = requests.Session()
+            headers = {'If-None-Match': self.etag} if self.etag else {}
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            self.fetched_at = time.monotonic()
+            if response.status_code == 304 and self.articles is not None:
+                logging.debug("News not modified since last fetch")
+                return self.articles
+            response.raise_for_status()
+
+            news_data = response.json()
+            if news_data.get('status') != 'ok':
+                raise RuntimeError(f"Failed to fetch news. Status: {news_data.get('status')}")
+            self.etag = response.headers.get('ETag')
+            self.articles = tuple(
+                (article['url'], article['title'], article.get('description'))
+                for article in news_data['articles'][:self.max_articles]
+            )
+            return self.articles
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    # Content-addressed cache of LLM analysis results. Entries are keyed on the
+    # normalised message text plus the prompt version, kept in an in-memory LRU
+    # and optionally mirrored to SQLite so they survive restarts.
+
+    def __init__(self, prompt_version, max_entries=512, ttl=6 * 3600, db_path=None):
+        self.prompt_version = str(prompt_version)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.bypass = False
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        if db_path:
+            self.open_db(db_path)
+
+    def open_db(self, db_path):
+        try:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                "key TEXT PRIMARY KEY, analysis TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self.db.execute("DELETE FROM analysis_cache WHERE created < ?", (time.time() - self.ttl,))
+            self.db.commit()
+        except sqlite3.Error as e:
+            logging.error("Failed to open analysis cache database %s: %s", db_path, e)
+            self.db = None
+
+    @staticmethod
+    def normalise(message_content):
+        return " ".join(message_content.lower().split())
+
+    def make_key(self, message_content, scope=""):
+        version = f"{self.prompt_version}:{scope}" if scope else self.prompt_version
+        text = f"{version}\n{self.normalise(message_content)}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, message_content, scope=""):
+        if self.bypass:
+            return None
+
+        key = self.make_key(message_content, scope)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                created, analysis = entry
+                if now - created <= self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(analysis)
+                del self.entries[key]
+
+            analysis = self.load_from_db(key, now)
+            if analysis is not None:
+                self.disk_hits += 1
+                return dict(analysis)
+
+            self.misses += 1
+            return None
+
+    def put(self, message_content, analysis, scope=""):
+        if self.bypass:
+            return
+
+        key = self.make_key(message_content, scope)
+        created = time.time()
+        with self.lock:
+            self.store(key, created, dict(analysis))
+            if self.db is not None:
+                try:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO analysis_cache (key, analysis, created) VALUES (?, ?, ?)",
+                        (key, json.dumps(analysis), created),
+                    )
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    logging.error("Failed to persist analysis cache entry: %s", e)
+
+    def store(self, key, created, analysis):
+        self.entries[key] = (created, analysis)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load_from_db(self, key, now):
+        if self.db is None:
+            return None
+        try:
+            row = self.db.execute(
+                "SELECT analysis, created FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error("Failed to read analysis cache entry: %s", e)
+            return None
+        if row is None or now - row[1] > self.ttl:
+            return None
+        analysis = json.loads(row[0])
+        self.store(key, row[1], analysis)
+        return analysis
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from utils import latency
+
+BatchReport = namedtuple("BatchReport", ["results", "fill_prices", "price_spread", "elapsed"])
+
+
+class ExecutionEngine:
+    # Submits all legs of a signal to the MT5 gateway in one go. The gateway
+    # thread owns the terminal connection and sends them back to back, so the
+    # last leg isn't held up by event-loop round trips between the first ones.
+
+    def __init__(self, mt5_service):
+        self.mt5_service = mt5_service
+
+    async def submit_legs(self, requests):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+
+        # Queue every leg before awaiting any of them
+        futures = [self.mt5_service.gateway.submit(self.mt5_service.send_order, request) for request in requests]
+
+        async def send_leg(index, future):
+            try:
+                result = await asyncio.wrap_future(future, loop=loop)
+            except Exception as e:
+                logging.error("Leg %s/%s raised: %s", index + 1, len(requests), e)
+                result = None
+            return index, result, time.perf_counter() - started
+
+        results = [None] * len(requests)
+        tasks = [asyncio.ensure_future(send_leg(i, future)) for i, future in enumerate(futures)]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                index, result, leg_elapsed = await completed
+                results[index] = result
+                latency.record('order_send', int(leg_elapsed * 1e9))
+                if result is not None:
+                    logging.info("Leg %s/%s filled at %s after %.1f ms", index + 1, len(requests), result.price, leg_elapsed * 1000)
+                else:
+                    logging.warning("Leg %s/%s failed after %.1f ms", index + 1, len(requests), leg_elapsed * 1000)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+
+        elapsed = time.perf_counter() - started
+        latency.record('fill', int(elapsed * 1e9))
+        fill_prices = [result.price for result in results if result is not None]
+        price_spread = max(fill_prices) - min(fill_prices) if fill_prices else None
+        logging.info("Submitted %s legs in %.1f ms, %s filled, fill-price spread: %s",
+                     len(requests), elapsed * 1000, len(fill_prices), price_spread)
+        return BatchReport(results, fill_prices, price_spread, elapsed)
@@ -0,0 +1,78 @@
+import asyncio
+import functools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class MT5Gateway:
+    # Single thread that owns the MetaTrader5 terminal connection. Every
+    # terminal call is queued here and executed in order, so the module is
+    # never entered from two threads at once and callers never block on it
+    # unless they explicitly ask to.
+
+    def __init__(self, name="mt5-gateway"):
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            future, func, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                logging.error("MT5 gateway call %s failed: %s", getattr(func, '__name__', func), e, exc_info=True)
+                future.set_exception(e)
+        logging.info("MT5 gateway stopped.")
+
+    def in_gateway_thread(self):
+        return threading.current_thread() is self.thread
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self.requests.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func, *args, **kwargs):
+        # Blocking call; runs inline when already on the gateway thread.
+        if self.in_gateway_thread():
+            return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    async def call_async(self, func, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stop(self):
+        self.requests.put(None)
+
+
+def on_gateway(method):
+    # Routes an MT5Service method through the service's gateway thread.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.gateway.call(method, self, *args, **kwargs)
+    return wrapper
+
+
+class AsyncMT5Proxy:
+    # Awaitable front-end for MT5Service: `await proxy.send_order(request)`
+    # runs MT5Service.send_order on the gateway thread without blocking the loop.
+
+    def __init__(self, mt5_service):
+        self.mt5_service = mt5_service
+
+    def __getattr__(self, name):
+        attr = getattr(self.mt5_service, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.mt5_service.gateway.call_async(attr, *args, **kwargs)
+        return call
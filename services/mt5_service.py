@@ -1,22 +1,60 @@
-import MetaTrader5 as mt5
 import logging
+import threading
+import time
+from collections import namedtuple
+from services.mt5_gateway import MT5Gateway, AsyncMT5Proxy, on_gateway
+
+# Static per-symbol metadata that doesn't change during a session
+SymbolMeta = namedtuple("SymbolMeta", ["name", "point", "digits", "volume_min", "volume_step", "filling_mode"])
+
+# Compact copy of the TradePosition fields the bot and GUI use
+PositionRow = namedtuple("PositionRow", ["ticket", "symbol", "type", "volume", "price_open", "price_current", "sl", "tp", "profit", "magic"])
+
+# All open positions from one terminal round trip; version increases with every snapshot
+PositionSnapshot = namedtuple("PositionSnapshot", ["version", "taken_at", "positions"])
+
+# The MetaTrader5 package is loaded by the first MT5Service, not on import, so
+# modules that only need the types above start without it
+mt5 = None
+
+
+def load_mt5():
+    global mt5
+    if mt5 is None:
+        import MetaTrader5
+        mt5 = MetaTrader5
+    return mt5
 
 class MT5Service:
-    # Add these constants at the beginning of the class
-    TRADE_ACTION_DEAL = mt5.TRADE_ACTION_DEAL
-    TRADE_ACTION_SLTP = mt5.TRADE_ACTION_SLTP
-    ORDER_TYPE_BUY = mt5.ORDER_TYPE_BUY
-    ORDER_TYPE_SELL = mt5.ORDER_TYPE_SELL
-    ORDER_TIME_GTC = mt5.ORDER_TIME_GTC
-    TRADE_RETCODE_DONE = mt5.TRADE_RETCODE_DONE
-
-    def __init__(self):
-        self.is_initialized = mt5.initialize()
+    # MT5 constant values, fixed by the terminal API, so reading them doesn't import MetaTrader5
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_SLTP = 6
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TIME_GTC = 0
+    TRADE_RETCODE_DONE = 10009
+
+    def __init__(self, tick_interval=0.25, tick_max_age=0.5):
+        load_mt5()
+        # All terminal access is serialised on one gateway thread
+        self.gateway = MT5Gateway()
+        self.symbol_cache = {}
+        self.tick_cache = {}
+        self.watched_symbols = set()
+        self.tick_interval = tick_interval
+        self.tick_max_age = tick_max_age
+        self.tick_poller = None
+        self.tick_poller_stop = threading.Event()
+        self.snapshot_version = 0
+        # Filling mode per symbol that order_check accepted during warm_up
+        self.filling_modes = {}
+        self.is_initialized = self.gateway.call(mt5.initialize)
         if not self.is_initialized:
             logging.error("Failed to initialize MT5.")
         else:
             logging.info("MT5 initialized successfully.")
 
+    @on_gateway
     def send_order(self, request):
         if not self.is_initialized:
             logging.error("Cannot send order: MT5 is not initialized.")
@@ -24,12 +62,13 @@ class MT5Service:
 
         result = mt5.order_send(request)
         if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-            logging.error(f"Failed to send order: {result}")
+            logging.error("Failed to send order: %s", result)
             return None
         else:
-            logging.info(f"Order executed successfully: {result}")
+            logging.info("Order executed successfully: %s", result)
         return result
 
+    @on_gateway
     def close_order(self, ticket):
         if not self.is_initialized:
             logging.error("Cannot close order: MT5 is not initialized.")
@@ -37,7 +76,7 @@ class MT5Service:
 
         trade = mt5.positions_get(ticket=ticket)
         if not trade:
-            logging.error(f"Failed to retrieve the open trade details for ticket {ticket}.")
+            logging.error("Failed to retrieve the open trade details for ticket %s.", ticket)
             return None
         
         trade = trade[0]  # Assuming only one trade for the given ticket
@@ -51,31 +90,38 @@ class MT5Service:
             "type": trade_type,
             "position": trade.ticket,
             "deviation": 20,
-            "magic": 234000,
+            "magic": trade.magic,
             "comment": "Auto-close trade",
         }
         
         result = self.send_order(request)
         if result:
-            logging.info(f"Trade on {symbol} closed successfully.")
+            logging.info("Trade on %s closed successfully.", symbol)
         else:
-            logging.error(f"Failed to close trade on {symbol}.")
+            logging.error("Failed to close trade on %s.", symbol)
         return result
     
-    def get_open_positions(self):
-        positions = mt5.positions_get()
-        open_positions = []
-        if positions:
-            for pos in positions:
-                open_positions.append({
-                    "symbol": pos.symbol,
-                    "type": "Buy" if pos.type == mt5.ORDER_TYPE_BUY else "Sell",
-                    "volume": pos.volume,
-                    "price": pos.price_open,
-                    "profit": pos.profit
-                })
-        return open_positions
-    
+    @on_gateway
+    def snapshot_positions(self, symbol=None, magic=None):
+        if not self.is_initialized:
+            logging.error("Cannot get positions: MT5 is not initialized.")
+            return None
+
+        positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
+        if positions is None:
+            logging.error("Failed to retrieve open positions: %s", mt5.last_error())
+            return None
+
+        self.snapshot_version += 1
+        rows = tuple(
+            PositionRow(pos.ticket, pos.symbol, pos.type, pos.volume, pos.price_open,
+                        pos.price_current, pos.sl, pos.tp, pos.profit, pos.magic)
+            for pos in positions
+            if magic is None or pos.magic == magic
+        )
+        return PositionSnapshot(self.snapshot_version, time.time(), rows)
+
+    @on_gateway
     def get_symbol_info(self, symbol):
         if not self.is_initialized:
             logging.error("Cannot get symbol info: MT5 is not initialized.")
@@ -83,9 +129,10 @@ class MT5Service:
 
         symbol_info = mt5.symbol_info(symbol)
         if symbol_info is None:
-            logging.error(f"Failed to get symbol info for {symbol}.")
+            logging.error("Failed to get symbol info for %s.", symbol)
         return symbol_info
 
+    @on_gateway
     def get_open_position(self, ticket):
         if not self.is_initialized:
             logging.error("Cannot get open position: MT5 is not initialized.")
@@ -95,9 +142,10 @@ class MT5Service:
         if positions:
             return positions[0]
         else:
-            logging.error(f"Failed to retrieve open position for ticket {ticket}.")
+            logging.error("Failed to retrieve open position for ticket %s.", ticket)
             return None
 
+    @on_gateway
     def get_account_info(self):
         if not self.is_initialized:
             logging.error("Cannot get account info: MT5 is not initialized.")
@@ -115,26 +163,32 @@ class MT5Service:
             "free_margin": account_info.margin_free
         }
 
-    def close_position(self, ticket, volume):
+    @on_gateway
+    def close_position(self, ticket, volume, position=None):
         if not self.is_initialized:
             logging.error("Cannot close position: MT5 is not initialized.")
             return None
 
-        position = mt5.positions_get(ticket=ticket)
-        if not position:
-            logging.error(f"Failed to retrieve position for ticket {ticket}.")
+        # Callers holding a snapshot row or book record can skip the lookup
+        if position is None:
+            position = self.get_open_position(ticket)
+            if position is None:
+                return None
+
+        tick = self.get_tick(position.symbol)
+        if tick is None:
             return None
 
-        position = position[0]
         request = {
             "action": mt5.TRADE_ACTION_DEAL,
             "symbol": position.symbol,
             "volume": volume,
             "type": mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
             "position": ticket,
-            "price": mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask,
+            "price": tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask,
             "deviation": 20,
-            "magic": 234000,
+            # The closing deal carries the position's magic so history stays attributed to its channel
+            "magic": position.magic,
             "comment": "Close position",
             "type_time": mt5.ORDER_TIME_GTC,
         }
@@ -144,40 +198,48 @@ class MT5Service:
             logging.error("Failed to close position: No result returned")
             return None
         if result.retcode != mt5.TRADE_RETCODE_DONE:
-            logging.error(f"Failed to close position: {result.comment}")
+            logging.error("Failed to close position: %s", result.comment)
         return result
 
-    def modify_position(self, ticket):
+    @on_gateway
+    def modify_position(self, ticket, sl=None, tp=None, position=None):
         if not self.is_initialized:
             logging.error("Cannot modify position: MT5 is not initialized.")
             return None
 
-        position = mt5.positions_get(ticket=ticket)
-        if not position:
-            logging.error(f"Failed to retrieve position for ticket {ticket}.")
-            return None
+        if position is None:
+            position = self.get_open_position(ticket)
+            if position is None:
+                return None
 
-        position = position[0]
-        symbol_info = mt5.symbol_info(position.symbol)
-        if symbol_info is None:
-            logging.error(f"Failed to retrieve symbol info for {position.symbol}")
+        symbol_meta = self.get_symbol_meta(position.symbol)
+        if symbol_meta is None:
+            logging.error("Failed to retrieve symbol info for %s", position.symbol)
             return None
 
-        point = symbol_info.point
-        digits = symbol_info.digits
+        point = symbol_meta.point
+        digits = symbol_meta.digits
 
-        current_price = mt5.symbol_info_tick(position.symbol).ask if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).bid
+        if sl is None and tp is None:
+            tick = self.get_tick(position.symbol)
+            if tick is None:
+                return None
+            current_price = tick.ask if position.type == mt5.ORDER_TYPE_BUY else tick.bid
 
-        # Set SL and TP distances (300 pips for SL, 1100 pips for TP)
-        sl_distance = 3000 * point  # 300 pips
-        tp_distance = 11000 * point  # 1100 pips
+            # Set SL and TP distances (300 pips for SL, 1100 pips for TP)
+            sl_distance = 3000 * point  # 300 pips
+            tp_distance = 11000 * point  # 1100 pips
 
-        if position.type == mt5.ORDER_TYPE_BUY:
-            sl = current_price - sl_distance
-            tp = current_price + tp_distance
-        else:  # SELL
-            sl = current_price + sl_distance
-            tp = current_price - tp_distance
+            if position.type == mt5.ORDER_TYPE_BUY:
+                sl = current_price - sl_distance
+                tp = current_price + tp_distance
+            else:  # SELL
+                sl = current_price + sl_distance
+                tp = current_price - tp_distance
+        else:
+            # Only one level was given; the other stays where it is
+            sl = position.sl if sl is None else sl
+            tp = position.tp if tp is None else tp
 
         sl = round(sl, digits)
         tp = round(tp, digits)
@@ -190,36 +252,174 @@ class MT5Service:
             "tp": tp,
         }
 
-        logging.info(f"Sending modify position request: {request}")
+        logging.info("Sending modify position request: %s", request)
         result = mt5.order_send(request)
         
         if result is None:
             last_error = mt5.last_error()
-            logging.error(f"Failed to modify position: No result returned. Last error: {last_error}")
+            logging.error("Failed to modify position: No result returned. Last error: %s", last_error)
             return None
         
         if result.retcode != mt5.TRADE_RETCODE_DONE:
-            logging.error(f"Failed to modify position: {result.comment}. Retcode: {result.retcode}")
+            logging.error("Failed to modify position: %s. Retcode: %s", result.comment, result.retcode)
         else:
-            logging.info(f"Position modified successfully: {result}")
+            logging.info("Position modified successfully: %s", result)
         
         return result
 
+    @on_gateway
     def get_current_price(self, symbol):
-        tick = mt5.symbol_info_tick(symbol)
+        tick = self.get_tick(symbol)
         if tick is None:
-            logging.error(f"Failed to get current price for {symbol}")
             return None
         return (tick.bid + tick.ask) / 2
 
-    def get_open_positions(self, symbol):
+    @on_gateway
+    def resolve_symbol(self, symbol):
+        # Resolves a signal symbol to the broker's name (e.g. XAUUSD -> XAUUSD.sml) once per session
+        if symbol in self.symbol_cache:
+            return self.symbol_cache[symbol]
+
+        possible_symbols = [symbol, f"{symbol}.sml", symbol.upper()]
+        for candidate in possible_symbols:
+            symbol_meta = self.get_symbol_meta(candidate)
+            if symbol_meta is not None:
+                self.symbol_cache[symbol] = symbol_meta
+                self.watch_symbol(symbol_meta.name)
+                return symbol_meta
+
+        logging.info("Failed to resolve symbol %s. Tried symbols: %s", symbol, ', '.join(possible_symbols))
+        return None
+
+    @on_gateway
+    def get_symbol_meta(self, symbol):
+        symbol_meta = self.symbol_cache.get(symbol)
+        if symbol_meta is not None:
+            return symbol_meta
+
         if not self.is_initialized:
-            logging.error("Cannot get open positions: MT5 is not initialized.")
-            return []
-        
-        positions = mt5.positions_get(symbol=symbol)
-        if positions is None:
-            logging.error(f"Failed to retrieve open positions for {symbol}")
-            return []
-        
-        return [position.ticket for position in positions]
\ No newline at end of file
+            logging.error("Cannot get symbol info: MT5 is not initialized.")
+            return None
+
+        symbol_info = mt5.symbol_info(symbol)
+        if symbol_info is None:
+            return None
+        if not symbol_info.visible:
+            mt5.symbol_select(symbol, True)
+
+        symbol_meta = SymbolMeta(
+            symbol_info.name,
+            symbol_info.point,
+            symbol_info.digits,
+            symbol_info.volume_min,
+            symbol_info.volume_step,
+            symbol_info.filling_mode,
+        )
+        self.symbol_cache[symbol] = symbol_meta
+        return symbol_meta
+
+    @on_gateway
+    def warm_up(self, symbols, volume=0.02):
+        # Selects and caches each symbol, primes its tick and dry-runs an order
+        # through order_check, so the first real signal pays for none of it.
+        # Returns {symbol: None when ready, otherwise the problem}.
+        readiness = {}
+        for symbol in symbols:
+            symbol_meta = self.resolve_symbol(symbol)
+            if symbol_meta is None:
+                readiness[symbol] = "unknown symbol"
+                continue
+            tick = self.get_tick(symbol_meta.name)
+            if tick is None:
+                readiness[symbol] = "no price"
+                continue
+            readiness[symbol] = self.check_order(symbol_meta, volume, tick.ask)
+        return readiness
+
+    @on_gateway
+    def check_order(self, symbol_meta, volume, price):
+        if volume < symbol_meta.volume_min:
+            return f"volume {volume} is below the minimum {symbol_meta.volume_min}"
+        steps = volume / symbol_meta.volume_step
+        if abs(steps - round(steps)) > 1e-6:
+            return f"volume {volume} is not a multiple of the step {symbol_meta.volume_step}"
+
+        # SYMBOL_FILLING_FOK (1) and SYMBOL_FILLING_IOC (2) flags; RETURN is always worth a try
+        candidates = []
+        if symbol_meta.filling_mode & 1:
+            candidates.append(mt5.ORDER_FILLING_FOK)
+        if symbol_meta.filling_mode & 2:
+            candidates.append(mt5.ORDER_FILLING_IOC)
+        candidates.append(mt5.ORDER_FILLING_RETURN)
+
+        for filling in candidates:
+            request = {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": symbol_meta.name,
+                "volume": volume,
+                "type": mt5.ORDER_TYPE_BUY,
+                "price": price,
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": filling,
+            }
+            result = mt5.order_check(request)
+            if result is None:
+                return f"order_check failed: {mt5.last_error()}"
+            # order_check reports success as 0 rather than TRADE_RETCODE_DONE
+            if result.retcode in (0, mt5.TRADE_RETCODE_DONE):
+                self.filling_modes[symbol_meta.name] = filling
+                return None
+            if result.retcode != mt5.TRADE_RETCODE_INVALID_FILL:
+                return f"order_check rejected the order: {result.comment} (retcode {result.retcode})"
+        return "no filling mode accepted"
+
+    def peek_tick(self, symbol, max_age=None):
+        # Memory-only read of the last polled tick; safe from any thread
+        cached = self.tick_cache.get(symbol)
+        if cached is None:
+            return None
+        fetched_at, tick = cached
+        if time.monotonic() - fetched_at > (self.tick_max_age if max_age is None else max_age):
+            return None
+        return tick
+
+    @on_gateway
+    def get_tick(self, symbol, max_age=None):
+        tick = self.peek_tick(symbol, max_age)
+        if tick is not None:
+            return tick
+
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is None:
+            logging.error("Failed to get current price for %s", symbol)
+            return None
+        self.tick_cache[symbol] = (time.monotonic(), tick)
+        return tick
+
+    @on_gateway
+    def refresh_ticks(self):
+        for symbol in list(self.watched_symbols):
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is not None:
+                self.tick_cache[symbol] = (time.monotonic(), tick)
+
+    def watch_symbol(self, symbol):
+        self.watched_symbols.add(symbol)
+        if self.tick_poller is None:
+            self.tick_poller = threading.Thread(target=self.poll_ticks, name="mt5-tick-poller", daemon=True)
+            self.tick_poller.start()
+
+    def poll_ticks(self):
+        pending = None
+        while not self.tick_poller_stop.wait(self.tick_interval):
+            # Skip a cycle rather than queue up refreshes behind slow terminal calls
+            if pending is None or pending.done():
+                pending = self.gateway.submit(self.refresh_ticks)
+
+    def async_api(self):
+        return AsyncMT5Proxy(self)
+
+    def shutdown(self):
+        self.tick_poller_stop.set()
+        self.gateway.call(mt5.shutdown)
+        self.gateway.stop()
@@ -1,32 +1,311 @@
-from together import Together
+import asyncio
+import json
 import logging
+import time
+from collections import deque
+from utils import latency
+from utils.json_scanner import JsonObjectScanner
 
-class TogetherClient:
-    def __init__(self, api_key):
-        self.client = Together(api_key=api_key)
+DEFAULT_MODEL = "meta-llama/Meta-Llama-3.1-405B-Instruct-Turbo"
 
-    def chat_completion(self, prompt):
-        try:
-            logging.info(f"Sending prompt to Together API: {prompt}")
-            response = self.client.chat.completions.create(
-                model="meta-llama/Meta-Llama-3.1-405B-Instruct-Turbo",
-                messages=[{"role": "system", "content": prompt}],
-                max_tokens=512,
-                temperature=0.7,
-                top_p=0.7,
-                top_k=50,
-                repetition_penalty=1,
-                stop=["<|eot_id|>","<|eom_id|>"]
-            # This causes the response to be streamed as a generator
+# Small low-latency model tried first by ModelRouter
+FAST_MODEL = "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"
+
+# aiohttp and json5 are loaded when the first client or router is created,
+# not on import, so code that never talks to the LLM doesn't pay for them
+aiohttp = None
+json5 = None
+
+
+def load_aiohttp():
+    global aiohttp
+    if aiohttp is None:
+        import aiohttp as module
+        aiohttp = module
+    return aiohttp
+
+
+def load_json5():
+    global json5
+    if json5 is None:
+        import json5 as module
+        json5 = module
+    return json5
+
+
+class AsyncTogetherClient:
+    # Native asyncio client for the Together chat completions endpoint.
+    # One pooled aiohttp session is kept per event loop (a session is bound to
+    # the loop that created it) so the TLS connection is reused between
+    # signals; cancelling the awaiting task aborts the request.
+    # With stream=True the completion is read as server-sent events and the
+    # request is dropped as soon as the first JSON object in it is complete.
+    API_URL = "https://api.together.xyz/v1/chat/completions"
+    MODELS_URL = "https://api.together.xyz/v1/models"
+
+    def __init__(self, api_key, model=DEFAULT_MODEL, timeout=30.0, connect_timeout=5.0, max_connections=8, stream=False):
+        load_aiohttp()
+        self.api_key = api_key
+        self.model = model
+        self.stream = stream
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.sessions = {}
+
+    def get_session(self):
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get(loop)
+        if session is None or session.closed:
+            # Sessions of loops that have since closed can't be used or closed any more
+            self.sessions = {owner: other for owner, other in self.sessions.items() if not owner.is_closed()}
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=75, ttl_dns_cache=300)
+            session = self.sessions[loop] = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
             )
+        return session
+
+    def build_payload(self, prompt, model=None, temperature=0.7, response_format=None, max_tokens=512):
+        payload = {
+            "model": model or self.model,
+            "messages": [{"role": "system", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": 0.7,
+            "top_k": 50,
+            "repetition_penalty": 1,
+            "stop": ["<|eot_id|>", "<|eom_id|>"],
+        }
+        if response_format is not None:
+            payload["response_format"] = response_format
+        return payload
+
+    def request_timeout(self, timeout=None):
+        return aiohttp.ClientTimeout(
+            total=timeout if timeout is not None else self.timeout,
+            sock_connect=self.connect_timeout,
+        )
+
+    async def chat_completion(self, prompt, timeout=None, **params):
+        # Returns the message content of the first choice, or None on failure.
+        # params override build_payload() defaults (model, temperature, response_format).
+        if self.stream:
+            return await self.stream_completion(prompt, timeout, **params)
+
+        request_timeout = self.request_timeout(timeout)
+        session = self.get_session()
+        try:
+            async with session.post(self.API_URL, json=self.build_payload(prompt, **params), timeout=request_timeout) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    logging.error("Together API returned HTTP %s: %s", response.status, body)
+                    return None
+                data = await response.json()
+        except asyncio.TimeoutError:
+            logging.error("Together API request timed out after %ss", request_timeout.total)
+            return None
+        except aiohttp.ClientError as e:
+            logging.error("Failed to get completion from Together API: %s", e)
+            return None
+
+        choices = data.get("choices") or []
+        if not choices or not choices[0].get("message", {}).get("content"):
+            logging.warning("Received an empty or invalid response from Together API.")
+            return None
+
+        return choices[0]["message"]["content"]
+
+    async def stream_completion(self, prompt, timeout=None, **params):
+        # Returns the first complete JSON object in the streamed content (or
+        # all of the content if none closes), or None on failure.
+        request_timeout = self.request_timeout(timeout)
+        payload = dict(self.build_payload(prompt, **params), stream=True)
+        scanner = JsonObjectScanner()
+        content = []
+        started = time.perf_counter_ns()
+        first_token = True
+        session = self.get_session()
+        try:
+            async with session.post(self.API_URL, json=payload, timeout=request_timeout) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    logging.error("Together API returned HTTP %s: %s", response.status, body)
+                    return None
+                async for line in response.content:
+                    line = line.strip()
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    token = choices[0].get("delta", {}).get("content") if choices else None
+                    if not token:
+                        continue
+                    if first_token:
+                        latency.record('llm_first_token', time.perf_counter_ns() - started)
+                        first_token = False
+                    content.append(token)
+                    if scanner.feed(token) is not None:
+                        # Stop generation server-side; the connection is not reused
+                        response.close()
+                        logging.debug("Closed completion stream after %s chunks", len(content))
+                        return scanner.result
+        except asyncio.TimeoutError:
+            logging.error("Together API stream timed out after %ss", request_timeout.total)
+            return None
+        except (aiohttp.ClientError, ValueError) as e:
+            logging.error("Failed to stream completion from Together API: %s", e)
+            return None
+
+        if not content:
+            logging.warning("Received an empty or invalid response from Together API.")
+            return None
+        return "".join(content)
+
+    async def ping(self, timeout=5.0):
+        # HEAD request that opens, or keeps open, a pooled TLS connection; any
+        # HTTP answer means the connection is up
+        try:
+            async with self.get_session().head(self.MODELS_URL, timeout=self.request_timeout(timeout)) as response:
+                return response.status < 500
+        except asyncio.TimeoutError:
+            logging.warning("Together API ping timed out after %ss", timeout)
+        except aiohttp.ClientError as e:
+            logging.warning("Together API ping failed: %s", e)
+        return False
+
+    async def warm_up(self, model=None):
+        # Connects and sends a one-token completion, so the first signal finds
+        # both the TLS session and the model already warm
+        started = time.perf_counter()
+        if not await self.ping():
+            return False
+        content = await self.chat_completion("Reply with {}", model=model, temperature=0, max_tokens=1)
+        logging.info("Together API warmed up for %s in %.0f ms", model or self.model, (time.perf_counter() - started) * 1000)
+        return content is not None
+
+    async def keep_alive(self, interval=30.0):
+        # Streamed completions drop their connection once the JSON object is
+        # complete; pinging keeps a warm one in the pool between signals
+        while True:
+            await asyncio.sleep(interval)
+            await self.ping()
+
+    async def close(self):
+        # Closes the calling loop's session; each loop closes its own
+        session = self.sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+class ModelStats:
+    __slots__ = ("requests", "failures", "rejected", "samples")
+
+    def __init__(self, max_samples):
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.samples = deque(maxlen=max_samples)
+
+    def report(self):
+        ordered = sorted(self.samples)
+        report = {"requests": self.requests, "failures": self.failures, "rejected": self.rejected}
+        if ordered:
+            report["p50_ms"] = latency.percentile(ordered, 0.50)
+            report["p95_ms"] = latency.percentile(ordered, 0.95)
+        return report
 
-            logging.info(f"Received response from Together API: {response}")
-            
-            if not response or not response.choices or not response.choices[0].message.content:
-                logging.warning("Received an empty or invalid response from Together API.")
-                return None
 
-            return response
-        except Exception as e:
-            logging.error(f"Failed to get completion from Together API: {e}")
+class ModelRouter:
+    # Sends each prompt to a small model first, at temperature 0 and in JSON
+    # mode with the caller's schema, and checks the answer with the caller's
+    # validator. Only when the small model fails, returns unparseable JSON
+    # or the validator reports problems is the prompt escalated to the large
+    # model with the original sampling settings.
+
+    def __init__(self, client, validator, schema=None, fast_model=FAST_MODEL, fallback_model=DEFAULT_MODEL, max_samples=512):
+        load_json5()
+        self.client = client
+        self.validator = validator
+        self.schema = schema
+        self.fast_model = fast_model
+        self.fallback_model = fallback_model
+        self.max_samples = max_samples
+        self.models = {}
+        self.routed = 0
+        self.escalations = 0
+
+    async def warm_up(self):
+        # Only the fast model is warmed; escalations are rare enough to pay their own way
+        return await self.client.warm_up(self.fast_model)
+
+    def model_stats(self, model):
+        stats = self.models.get(model)
+        if stats is None:
+            stats = self.models[model] = ModelStats(self.max_samples)
+        return stats
+
+    async def complete_json(self, prompt, timeout=None):
+        # Returns the parsed object, or None when no model produced JSON that
+        # passes the validator; the caller treats None as non-actionable.
+        self.routed += 1
+        response_format = {"type": "json_object"}
+        if self.schema is not None:
+            response_format["schema"] = self.schema
+        parsed, problems = await self.attempt(self.fast_model, prompt, timeout, temperature=0, response_format=response_format)
+        if parsed is not None and not problems:
+            return parsed
+
+        self.escalations += 1
+        logging.info("Escalating to %s (%s); escalation rate %.0f%%", self.fallback_model,
+                     "; ".join(problems) if problems else "no valid response", 100.0 * self.escalations / self.routed)
+        parsed, problems = await self.attempt(self.fallback_model, prompt, timeout)
+        if problems:
+            logging.warning("Discarding analysis from %s, it still has problems: %s", self.fallback_model, "; ".join(problems))
             return None
+        return parsed
+
+    async def attempt(self, model, prompt, timeout, **params):
+        stats = self.model_stats(model)
+        stats.requests += 1
+        started = time.perf_counter_ns()
+        response = await self.client.chat_completion(prompt, timeout, model=model, **params)
+        elapsed_ns = time.perf_counter_ns() - started
+        stats.samples.append(elapsed_ns / 1e6)
+        latency.record(f"llm:{model.rsplit('/', 1)[-1]}", elapsed_ns)
+
+        if response is None:
+            stats.failures += 1
+            return None, []
+
+        clean_response = response.strip().strip('```')
+        try:
+            with latency.span('json_parse'):
+                parsed = json5.loads(clean_response)
+        except ValueError as e:
+            logging.error("Failed to decode JSON5 from %s: %s - Cleaned Response: %s", model, e, clean_response)
+            stats.failures += 1
+            return None, []
+        if not isinstance(parsed, dict):
+            stats.failures += 1
+            return None, []
+
+        # Ensure that 'action' is always present in the response
+        parsed.setdefault('action', None)
+        problems = self.validator(parsed)
+        if problems:
+            stats.rejected += 1
+        return parsed, problems
+
+    def stats(self):
+        return {
+            "routed": self.routed,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.routed if self.routed else 0.0,
+            "models": {model: stats.report() for model, stats in self.models.items()},
+        }
@@ -0,0 +1,116 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+
+class TradeJournal:
+    # Append-only journal of signal -> analysis -> order request -> fill ->
+    # modification/close events in SQLite (WAL mode). Writes are queued and
+    # committed in batches on a background thread, so the order path only
+    # pays for a queue put.
+
+    def __init__(self, db_path, flush_interval=0.05, max_batch=256):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.events = queue.Queue()
+        self.flushed = threading.Condition()
+        self.pending = 0
+        self.init_db()
+        self.thread = threading.Thread(target=self.run, name="trade-journal", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        db = sqlite3.connect(self.db_path)
+        db.execute("PRAGMA journal_mode=WAL")
+        # fsync happens at WAL checkpoints rather than on every commit
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def init_db(self):
+        db = self.connect()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, kind TEXT NOT NULL, "
+            "signal_id TEXT, ticket INTEGER, payload TEXT)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS journal_ticket ON journal (ticket)")
+        db.commit()
+        db.close()
+
+    def record(self, kind, signal_id=None, ticket=None, **payload):
+        with self.flushed:
+            self.pending += 1
+        self.events.put((time.time(), kind, None if signal_id is None else str(signal_id), ticket, json.dumps(payload, default=str)))
+
+    def run(self):
+        db = self.connect()
+        while True:
+            event = self.events.get()
+            if event is None:
+                break
+            batch = [event]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    event = self.events.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            try:
+                db.executemany("INSERT INTO journal (ts, kind, signal_id, ticket, payload) VALUES (?, ?, ?, ?, ?)", batch)
+                db.commit()
+            except sqlite3.Error as e:
+                logging.error("Failed to write %s journal events: %s", len(batch), e)
+
+            with self.flushed:
+                self.pending -= len(batch)
+                self.flushed.notify_all()
+            if stopping:
+                break
+        db.close()
+
+    def flush(self, timeout=5.0):
+        with self.flushed:
+            return self.flushed.wait_for(lambda: self.pending == 0, timeout)
+
+    def replay_positions(self):
+        # Rebuilds {ticket: position fields} for every fill that has not been
+        # followed by a close event, with later modifications applied.
+        self.flush()
+        db = self.connect()
+        try:
+            rows = db.execute(
+                "SELECT kind, signal_id, ticket, payload FROM journal "
+                "WHERE kind IN ('fill', 'modify', 'close') ORDER BY id"
+            ).fetchall()
+        finally:
+            db.close()
+
+        positions = {}
+        for kind, signal_id, ticket, payload in rows:
+            if kind == 'fill':
+                fields = json.loads(payload)
+                fields['signal_id'] = signal_id
+                positions[ticket] = fields
+            elif kind == 'modify' and ticket in positions:
+                fields = json.loads(payload)
+                positions[ticket].update({key: value for key, value in fields.items() if value is not None})
+            elif kind == 'close':
+                positions.pop(ticket, None)
+        return positions
+
+    def close(self):
+        self.events.put(None)
+        self.thread.join(timeout=5.0)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def fake_terminal():
+    # The in-process MetaTrader5 stand-in, registered before any MT5Service loads the module
+    from benchmarks import fake_mt5
+    return fake_mt5.install()
+
+
+@pytest.fixture
+def terminal(fake_terminal):
+    fake_terminal.clear_positions()
+    return fake_terminal
+
+
+@pytest.fixture
+def service(terminal):
+    from services.mt5_service import MT5Service
+    service = MT5Service()
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def make_handler(terminal):
+    # Builds a TelegramClientHandler on the fake terminal with no Telegram or LLM access
+    from bot.telegram_client_handler import TelegramClientHandler
+    from services.mt5_service import MT5Service
+    from services.together_client import AsyncTogetherClient
+    services = []
+
+    def make(channels, trade_journal=None):
+        service = MT5Service()
+        services.append(service)
+        return TelegramClientHandler(None, None, None, channels, service, AsyncTogetherClient(api_key="test"),
+                                     trade_journal=trade_journal)
+
+    yield make
+    for service in services:
+        service.shutdown()
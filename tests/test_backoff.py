@@ -0,0 +1,16 @@
+from utils.backoff import Backoff
+
+
+def test_delays_grow_within_jitter_bounds_and_cap():
+    backoff = Backoff(initial=0.5, maximum=4.0, factor=2.0)
+    for ceiling in (0.5, 1.0, 2.0, 4.0, 4.0, 4.0):
+        delay = backoff.next()
+        assert ceiling / 2 <= delay <= ceiling
+
+
+def test_reset_starts_over():
+    backoff = Backoff(initial=1.0, maximum=60.0)
+    for _ in range(5):
+        backoff.next()
+    backoff.reset()
+    assert 0.5 <= backoff.next() <= 1.0
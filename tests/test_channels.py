@@ -0,0 +1,22 @@
+import asyncio
+
+from bot.channels import ChannelPipeline, ChannelProfile
+
+
+def test_pipeline_hands_signal_id_to_process():
+    processed = []
+
+    async def process(message_content, profile, analysis, signal_id):
+        processed.append((message_content, analysis['action'], signal_id))
+
+    async def run():
+        pipeline = ChannelPipeline(ChannelProfile(5), process)
+        pipeline.start()
+        pipeline.offer("Close all", signal_id="5:101")
+        pipeline.offer("Move SL to breakeven", signal_id="5:102")
+        while len(processed) < 2:
+            await asyncio.sleep(0)
+        await pipeline.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 1))
+    assert processed == [("Close all", 'close_trade', "5:101"), ("Move SL to breakeven", 'breakeven', "5:102")]
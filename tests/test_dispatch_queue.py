@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from bot.dispatch_queue import DispatchQueue
+
+
+def take(queue):
+    # get() never blocks here: every test only asks for an entry that is ready
+    return asyncio.run(asyncio.wait_for(queue.get(), 1)).item
+
+
+def test_symbol_less_breakeven_passes_queued_opens():
+    queue = DispatchQueue()
+    queue.put_nowait("open XAUUSD", key="XAUUSD")
+    queue.put_nowait("open EURUSD", key="EURUSD")
+    queue.put_nowait("breakeven", key=None, priority=True)
+    assert take(queue) == "breakeven"
+
+
+def test_symbol_less_breakeven_waits_for_active_entries():
+    queue = DispatchQueue()
+    queue.put_nowait("open XAUUSD", key="XAUUSD")
+    assert take(queue) == "open XAUUSD"
+    queue.put_nowait("breakeven", key=None, priority=True)
+    assert queue.next_ready() is None
+
+
+def test_update_waits_for_open_on_same_symbol():
+    queue = DispatchQueue()
+    queue.put_nowait("open XAUUSD", key="XAUUSD")
+    queue.put_nowait("open EURUSD", key="EURUSD")
+    queue.put_nowait("update XAUUSD", key="XAUUSD", priority=True)
+    first = asyncio.run(queue.get())
+    assert first.item == "open XAUUSD"
+    # The update stays behind the XAUUSD open while it runs; EURUSD is free
+    assert take(queue) == "open EURUSD"
+    assert queue.next_ready() is None
+    queue.task_done(first)
+    assert take(queue) == "update XAUUSD"
+
+
+def test_priority_entries_keep_arrival_order():
+    queue = DispatchQueue()
+    queue.put_nowait("update XAUUSD", key="XAUUSD", priority=True)
+    queue.put_nowait("breakeven", key=None, priority=True)
+    assert take(queue) == "update XAUUSD"
+    assert queue.next_ready() is None
+
+
+def test_unknown_symbol_orders_against_normal_entries():
+    queue = DispatchQueue()
+    queue.put_nowait("needs llm", key=None)
+    queue.put_nowait("open XAUUSD", key="XAUUSD")
+    assert take(queue) == "needs llm"
+    assert queue.next_ready() is None
+
+
+def test_close_supersedes_queued_entries_for_its_symbol():
+    queue = DispatchQueue()
+    queue.put_nowait("open XAUUSD", key="XAUUSD")
+    queue.put_nowait("open EURUSD", key="EURUSD")
+    queue.put_nowait("close XAUUSD", key="XAUUSD", priority=True, supersede=True)
+    assert [entry.item for entry in queue.entries] == ["open EURUSD", "close XAUUSD"]
+    assert queue.shed == 1
+
+
+def test_stale_and_late_entries_are_shed():
+    queue = DispatchQueue(max_age=5)
+    assert queue.put_nowait("late open", key="XAUUSD", posted_at=time.time() - 10, late=True) is None
+    queue.put_nowait("old open", key="XAUUSD", posted_at=time.time() - 10)
+    queue.put_nowait("fresh open", key="EURUSD")
+    assert take(queue) == "fresh open"
+    assert queue.stats()["shed"] == 2
+    assert queue.stats()["late"] == 1
+
+
+def test_full_queue_sheds_oldest_normal_entry():
+    queue = DispatchQueue(maxsize=2)
+    queue.put_nowait("breakeven", key=None, priority=True)
+    queue.put_nowait("open XAUUSD", key="XAUUSD")
+    queue.put_nowait("open EURUSD", key="EURUSD")
+    assert [entry.item for entry in queue.entries] == ["breakeven", "open EURUSD"]
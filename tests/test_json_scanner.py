@@ -0,0 +1,35 @@
+from utils.json_scanner import JsonObjectScanner
+
+
+def feed_all(chunks):
+    scanner = JsonObjectScanner()
+    for chunk in chunks:
+        result = scanner.feed(chunk)
+        if result is not None:
+            return result
+    return None
+
+
+def test_object_split_across_chunks_after_code_fence():
+    chunks = ["```json\n", "{action: 'open", "_trade', take_profit: {tp1: 2305", "}}", "\n```", " trailing"]
+    assert feed_all(chunks) == "{action: 'open_trade', take_profit: {tp1: 2305}}"
+
+
+def test_brackets_and_escaped_quotes_inside_strings():
+    text = '{"comment": "close {half} \\"now\\" ]", "symbol": \'XAU}USD\'}'
+    assert feed_all([text[:10], text[10:25], text[25:]]) == text
+
+
+def test_stops_at_first_complete_object():
+    scanner = JsonObjectScanner()
+    assert scanner.feed('{"a": [1, 2]} {"b": 3}') == '{"a": [1, 2]}'
+    assert scanner.complete
+    assert scanner.feed('{"c": 4}') == '{"a": [1, 2]}'
+
+
+def test_incomplete_stream_keeps_partial_text():
+    scanner = JsonObjectScanner()
+    assert scanner.feed("no object yet") is None
+    assert scanner.feed('{"action": "breakeven"') is None
+    assert not scanner.complete
+    assert scanner.text() == '{"action": "breakeven"'
@@ -0,0 +1,11 @@
+from bot.position_book import PositionRecord
+
+
+def test_closes_carry_the_positions_magic(terminal, service):
+    first, second = terminal.seed_positions(2, symbol="EURUSD", magic=234007)
+
+    result = service.close_position(first.ticket, first.volume, position=PositionRecord.from_position(first))
+    assert result.request.magic == 234007
+    # close_order looks the position up itself
+    assert service.close_order(second.ticket).request.magic == 234007
+    assert not terminal.positions
@@ -0,0 +1,79 @@
+from collections import namedtuple
+
+from bot.position_book import PositionBook, PositionRecord
+
+Position = namedtuple("Position", ["ticket", "volume", "sl", "tp"])
+
+
+def record(ticket, symbol="XAUUSD", magic=234000, signal_id="5:1", opened_version=0):
+    return PositionRecord(ticket, symbol, 0, 0.02, 2300.0, magic=magic, signal_id=signal_id, opened_version=opened_version)
+
+
+def tickets(records):
+    return [record.ticket for record in records]
+
+
+def book_with(*records):
+    book = PositionBook()
+    for item in records:
+        book.add(item)
+    return book
+
+
+def test_indexes_follow_add_and_remove():
+    book = book_with(record(1), record(2, symbol="EURUSD"), record(3, magic=234001, signal_id="6:1"))
+    assert tickets(book.for_symbol("XAUUSD")) == [1, 3]
+    assert tickets(book.for_magic(234000)) == [1, 2]
+    assert tickets(book.for_signal("5:1")) == [1, 2]
+
+    book.remove(3)
+    assert 3 not in book
+    assert tickets(book.for_symbol("XAUUSD")) == [1]
+    # Emptied index keys are dropped
+    assert 234001 not in book.by_magic
+    assert "6:1" not in book.by_signal
+    assert book.remove(3) is None
+
+
+def test_re_adding_a_ticket_reindexes_it():
+    book = book_with(record(1))
+    book.add(record(1, symbol="EURUSD", signal_id=None))
+    assert len(book) == 1
+    assert book.for_symbol("XAUUSD") == []
+    assert tickets(book.for_symbol("EURUSD")) == [1]
+    assert book.for_signal("5:1") == []
+
+
+def test_update_levels_keeps_levels_that_are_not_given():
+    book = book_with(record(1))
+    book.update_levels(1, sl=2295.0)
+    book.update_levels(1, tp=2330.0)
+    assert (book.get(1).sl, book.get(1).tp) == (2295.0, 2330.0)
+    assert book.update_levels(2, sl=1.0) is None
+
+
+def test_reconcile_drops_closed_tickets_and_refreshes_levels():
+    book = book_with(record(1), record(2), record(3))
+    removed = book.reconcile([Position(1, 0.01, 2295.0, 2330.0), Position(3, 0.02, 0.0, 0.0)], version=1)
+    assert removed == [2]
+    assert book.tickets() == [1, 3]
+    assert (book.get(1).volume, book.get(1).sl, book.get(1).tp) == (0.01, 2295.0, 2330.0)
+    assert book.snapshot_version == 1
+
+
+def test_reconcile_ignores_stale_snapshots():
+    book = book_with(record(1))
+    book.reconcile([Position(1, 0.02, 2295.0, 0.0)], version=5)
+    assert book.reconcile([], version=5) == []
+    assert book.reconcile([], version=4) == []
+    assert book.tickets() == [1]
+    assert book.get(1).sl == 2295.0
+    assert book.snapshot_version == 5
+
+
+def test_reconcile_keeps_fills_newer_than_the_snapshot():
+    # A fill booked after snapshot 3 was requested may be missing from it
+    book = book_with(record(1, opened_version=3), record(2, opened_version=2))
+    assert book.reconcile([], version=3) == [2]
+    assert book.tickets() == [1]
+    assert book.reconcile([], version=4) == [1]
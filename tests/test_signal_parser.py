@@ -0,0 +1,55 @@
+from bot.signal_parser import SignalParser
+
+
+def parse(message, default_symbol=None):
+    return SignalParser(default_symbol).parse(message)
+
+
+def test_open_with_entry_range_and_targets():
+    analysis = parse("GOLD SELL 2310-2314\nSL 2320\nTP1 2305\nTP2 2300")
+    assert analysis['action'] == 'open_trade'
+    assert analysis['symbol'] == 'XAUUSD'
+    assert analysis['direction'] == 'sell'
+    assert analysis['entry'] == {'min': 2310.0, 'max': 2314.0}
+    assert analysis['stop_loss'] == 2320.0
+    assert analysis['take_profit'] == [2305.0, 2300.0]
+
+
+def test_market_open_without_entry_price():
+    analysis = parse("BUY XAUUSD now SL 2290 TP 2310/2320")
+    assert analysis['action'] == 'open_trade'
+    assert analysis['entry'] is None
+    assert analysis['take_profit'] == [2310.0, 2320.0]
+
+
+def test_default_symbol_fills_in_missing_symbol():
+    assert parse("Sell now sl 2320 tp 2300") is None
+    assert parse("Sell now sl 2320 tp 2300", default_symbol="XAUUSD")['symbol'] == 'XAUUSD'
+
+
+def test_management_messages():
+    assert parse("Move SL to breakeven")['action'] == 'breakeven'
+    assert parse("SL to entry")['action'] == 'breakeven'
+    assert parse("be")['action'] == 'breakeven'
+    assert parse("Close all")['action'] == 'close_trade'
+    update = parse("Move SL: 2295 XAUUSD")
+    assert update['action'] == 'update_trade'
+    assert (update['symbol'], update['stop_loss'], update['take_profit']) == ('XAUUSD', 2295.0, None)
+
+
+def test_levels_moved_to_a_price():
+    for message in ("Move SL to 2295", "SL moved to 2295", "sl to 2295"):
+        update = parse(message)
+        assert (update['action'], update['stop_loss'], update['take_profit']) == ('update_trade', 2295.0, None)
+    update = parse("TP to 2360")
+    assert (update['action'], update['stop_loss'], update['take_profit']) == ('update_trade', None, 2360.0)
+    assert parse("XAUUSD BUY NOW\nSL to 2290\nTP 2310")['stop_loss'] == 2290.0
+
+
+def test_chatter_is_skipped():
+    assert parse("Good morning traders") == {'action': None}
+    assert parse("") == {'action': None}
+
+
+def test_ambiguous_messages_go_to_the_llm():
+    assert parse("Gold looking strong today, 2300 next?") is None
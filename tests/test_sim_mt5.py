@@ -0,0 +1,47 @@
+import pytest
+
+from backtest.sim_mt5 import SimTick, SimulatedMT5Service, TickFeed, VirtualClock
+
+
+@pytest.fixture
+def sim():
+    feed = TickFeed()
+    feed.add("XAUUSD", [SimTick(t, 2300 + t, 2300.3 + t) for t in range(0, 100, 10)])
+    # EURUSD quotes only start after the clock's current time
+    feed.add("EURUSD", [SimTick(1000, 1.08, 1.0801)])
+    sim = SimulatedMT5Service(feed, VirtualClock(10))
+    yield sim
+    sim.shutdown()
+
+
+def open_buy(sim, symbol="XAUUSD", volume=0.04):
+    return sim.send_order({"action": sim.TRADE_ACTION_DEAL, "symbol": symbol, "volume": volume,
+                           "type": sim.ORDER_TYPE_BUY, "magic": 234000})
+
+
+def test_partial_close_keeps_the_rest_open(sim):
+    ticket = open_buy(sim).order
+    result = sim.close_position(ticket, 0.01)
+    assert (result.retcode, result.volume) == (sim.TRADE_RETCODE_DONE, 0.01)
+    assert sim.positions[ticket].volume == 0.03
+    assert [closed.volume for closed in sim.closed] == [0.01]
+
+    sim.close_position(ticket)
+    assert ticket not in sim.positions
+    assert [closed.volume for closed in sim.closed] == [0.01, 0.03]
+
+
+def test_close_rejects_more_than_the_position_holds(sim):
+    ticket = open_buy(sim).order
+    assert sim.close_position(ticket, 0.05).retcode == sim.TRADE_RETCODE_INVALID
+    assert sim.positions[ticket].volume == 0.04
+
+
+def test_close_without_a_quote_is_rejected(sim):
+    ticket = open_buy(sim).order
+    # The position's symbol loses its quotes, as when the feed has no tick yet
+    sim.positions[ticket].symbol = "EURUSD"
+    result = sim.close_position(ticket, 0.04)
+    assert result.retcode == sim.TRADE_RETCODE_INVALID
+    assert ticket in sim.positions
+    assert sim.modify_position(ticket).retcode == sim.TRADE_RETCODE_INVALID
@@ -0,0 +1,24 @@
+import asyncio
+
+from services.together_client import AsyncTogetherClient
+
+
+def test_each_event_loop_gets_its_own_session():
+    client = AsyncTogetherClient(api_key="test")
+
+    async def use():
+        session = client.get_session()
+        assert client.get_session() is session
+        return session
+
+    async def use_and_close():
+        session = await use()
+        await client.close()
+        assert session.closed
+        return session
+
+    first = asyncio.run(use())
+    second = asyncio.run(use_and_close())
+    assert second is not first
+    # The first loop is gone, so its session was dropped rather than reused
+    assert client.sessions == {}
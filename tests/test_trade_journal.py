@@ -0,0 +1,57 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from bot.channels import ChannelProfile
+from services.trade_journal import TradeJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = TradeJournal(str(tmp_path / "journal.db"))
+    yield journal
+    journal.close()
+
+
+def fill(journal, signal_id, ticket, symbol="XAUUSD.sml"):
+    journal.record('fill', signal_id=signal_id, ticket=ticket, symbol=symbol, type=0, volume=0.02,
+                   price_open=2300.3, magic=234000)
+
+
+def test_replay_applies_modifies_and_drops_closed_tickets(journal):
+    fill(journal, "5:1", 101)
+    fill(journal, "5:1", 102)
+    fill(journal, "5:2", 103, symbol="EURUSD")
+    journal.record('modify', signal_id="5:1", ticket=101, sl=2295.0, tp=None)
+    journal.record('modify', signal_id="5:1", ticket=101, sl=None, tp=2330.0)
+    journal.record('close', signal_id="5:1", ticket=102, reason='close_trade')
+    # Events that don't describe positions are ignored
+    journal.record('signal', signal_id="5:3", message="hello")
+
+    positions = journal.replay_positions()
+
+    assert sorted(positions) == [101, 103]
+    assert positions[101] == {'symbol': "XAUUSD.sml", 'type': 0, 'volume': 0.02, 'price_open': 2300.3,
+                              'magic': 234000, 'signal_id': "5:1", 'sl': 2295.0, 'tp': 2330.0}
+    assert positions[103]['symbol'] == "EURUSD"
+    assert positions[103]['signal_id'] == "5:2"
+
+
+def test_recover_keeps_live_tickets_and_closes_missing_ones(terminal, make_handler, journal):
+    live = terminal.seed_positions(1)[0]
+    fill(journal, "5:1", live.ticket)
+    fill(journal, "5:1", 999)
+    channel = ChannelProfile(5)
+    handler = make_handler([channel], trade_journal=journal)
+
+    asyncio.run(handler.recover_positions())
+
+    assert handler.positions.tickets() == [live.ticket]
+    assert handler.positions.for_signal("5:1")[0].ticket == live.ticket
+    assert sorted(journal.replay_positions()) == [live.ticket]
+    db = sqlite3.connect(journal.db_path)
+    closes = db.execute("SELECT ticket, payload FROM journal WHERE kind = 'close'").fetchall()
+    db.close()
+    assert [(ticket, json.loads(payload)) for ticket, payload in closes] == [(999, {'reason': 'recovery'})]
@@ -0,0 +1,52 @@
+import asyncio
+
+from bot.channels import ChannelProfile
+from bot.position_book import PositionRecord
+
+
+def seed(handler, terminal, channel, symbol, count):
+    for position in terminal.seed_positions(count, symbol=symbol, magic=channel.magic):
+        handler.positions.add(PositionRecord.from_position(position))
+
+
+def levels(terminal, symbol):
+    return sorted((position.sl, position.tp) for position in terminal.positions.values() if position.symbol == symbol)
+
+
+def test_update_naming_a_symbol_only_moves_that_symbols_legs(terminal, make_handler):
+    channel = ChannelProfile(5)
+    handler = make_handler([channel])
+    seed(handler, terminal, channel, "XAUUSD.sml", 4)
+    seed(handler, terminal, channel, "EURUSD", 4)
+
+    message = "Move SL: 2295 XAUUSD"
+    asyncio.run(handler.process_message(message, channel, channel.parser.parse(message)))
+
+    assert levels(terminal, "XAUUSD.sml") == [(2295.0, 0.0)] * 4
+    assert levels(terminal, "EURUSD") == [(0.0, 0.0)] * 4
+
+
+def test_symbol_less_breakeven_is_worked_out_per_symbol(terminal, make_handler):
+    channel = ChannelProfile(5)
+    handler = make_handler([channel])
+    seed(handler, terminal, channel, "XAUUSD.sml", 4)
+    seed(handler, terminal, channel, "EURUSD", 4)
+
+    message = "Move SL to breakeven"
+    asyncio.run(handler.process_message(message, channel, channel.parser.parse(message)))
+
+    # Half of each symbol's legs are closed; the rest get a stop at that symbol's own entry
+    assert [sl for sl, _ in levels(terminal, "XAUUSD.sml")] == [2300.25, 2300.25]
+    assert [sl for sl, _ in levels(terminal, "EURUSD")] == [1.08005, 1.08005]
+
+
+def test_other_channels_legs_are_left_alone(terminal, make_handler):
+    channel, other = ChannelProfile(5), ChannelProfile(6, magic=234001)
+    handler = make_handler([channel, other])
+    seed(handler, terminal, channel, "XAUUSD.sml", 2)
+    seed(handler, terminal, other, "XAUUSD.sml", 2)
+
+    message = "Close all"
+    asyncio.run(handler.process_message(message, channel, channel.parser.parse(message)))
+
+    assert [position.magic for position in terminal.positions.values()] == [234001, 234001]
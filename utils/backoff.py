@@ -0,0 +1,22 @@
+import random
+
+
+class Backoff:
+    # Exponential backoff with jitter: each delay is drawn from the upper half
+    # of initial * factor ** attempt (capped at maximum), so a blip retries in
+    # well under a second while an outage backs off without clients retrying
+    # in lockstep.
+
+    def __init__(self, initial=0.5, maximum=60.0, factor=2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempt = 0
+
+    def next(self):
+        ceiling = min(self.maximum, self.initial * self.factor ** self.attempt)
+        self.attempt += 1
+        return random.uniform(ceiling / 2, ceiling)
+
+    def reset(self):
+        self.attempt = 0
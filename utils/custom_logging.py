@@ -1,17 +1,47 @@
 import logging
-from PySide6.QtCore import QObject, Signal
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Signal
 
-class QTextEditLogger(logging.Handler, QObject):
-    log_signal = Signal(str)  # Signal to send log messages to the QTextEdit
 
-    def __init__(self, parent):
-        logging.Handler.__init__(self)
-        QObject.__init__(self)
-        self.widget = parent
+class QtLogBridge(QObject):
+    # Buffers formatted log lines from the logging listener thread and hands
+    # them to the GUI as one batch per frame.
+    records_ready = Signal(list)
 
-        # Connect the signal to the append method of the QTextEdit widget
-        self.log_signal.connect(self.widget.appendPlainText)
+    def __init__(self, frame_interval_ms=16, max_buffer=5000, parent=None):
+        super().__init__(parent)
+        self.buffer = deque(maxlen=max_buffer)
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(frame_interval_ms)
+
+    def push(self, record, message):
+        with self.lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append((record, message))
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer:
+                return
+            batch = list(self.buffer)
+            self.buffer.clear()
+        self.records_ready.emit(batch)
+
+
+class QtLogHandler(logging.Handler):
+    # Runs on the logging listener thread; never touches widgets directly.
+
+    def __init__(self, bridge):
+        super().__init__()
+        self.bridge = bridge
 
     def emit(self, record):
-        msg = self.format(record)
-        self.log_signal.emit(msg)  # Emit the signal to update the QTextEdit
+        try:
+            self.bridge.push(record, self.format(record))
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,56 @@
+class JsonObjectScanner:
+    # Incremental scanner that finds the first complete top-level JSON (or
+    # JSON5) object in text arriving in chunks. Anything before the opening
+    # brace, such as a code fence, is skipped; brackets inside strings and
+    # escaped quotes are ignored. Each character is looked at once.
+
+    def __init__(self):
+        self.parts = []
+        self.depth = 0
+        self.quote = None
+        self.escaped = False
+        self.started = False
+        self.result = None
+
+    @property
+    def complete(self):
+        return self.result is not None
+
+    def feed(self, chunk):
+        # Returns the object text once its closing brace has arrived, else None.
+        if self.result is not None:
+            return self.result
+
+        start = 0
+        if not self.started:
+            start = chunk.find("{")
+            if start < 0:
+                return None
+            self.started = True
+
+        for index in range(start, len(chunk)):
+            char = chunk[index]
+            if self.quote is not None:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == self.quote:
+                    self.quote = None
+            elif char == '"' or char == "'":
+                self.quote = char
+            elif char == "{" or char == "[":
+                self.depth += 1
+            elif char == "}" or char == "]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.parts.append(chunk[start:index + 1])
+                    self.result = "".join(self.parts)
+                    return self.result
+
+        self.parts.append(chunk[start:])
+        return None
+
+    def text(self):
+        # Whatever was collected so far, for callers whose stream ended early
+        return self.result if self.result is not None else "".join(self.parts)
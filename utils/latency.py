@@ -0,0 +1,161 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Trace of the signal currently being processed; asyncio tasks inherit it,
+# so nested calls can record spans without it being passed around.
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class SignalTrace:
+    __slots__ = ("signal_id", "started_ns", "spans")
+
+    def __init__(self, signal_id, started_ns=None):
+        self.signal_id = signal_id
+        self.started_ns = time.perf_counter_ns() if started_ns is None else started_ns
+        self.spans = []
+
+    def add(self, stage, duration_ns):
+        self.spans.append((stage, duration_ns))
+
+    def breakdown(self):
+        total_ns = time.perf_counter_ns() - self.started_ns
+        return {
+            "signal_id": self.signal_id,
+            "total_ms": total_ns / 1e6,
+            "spans": [(stage, duration_ns / 1e6) for stage, duration_ns in self.spans],
+        }
+
+
+@contextmanager
+def span(stage):
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        trace.add(stage, time.perf_counter_ns() - started)
+
+
+def record(stage, duration_ns):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(stage, duration_ns)
+
+
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class LatencyTracker:
+    # Collects per-signal span durations and keeps a bounded sample window per
+    # stage for p50/p95/p99 reporting.
+
+    def __init__(self, max_samples=2048, max_traces=100):
+        self.max_samples = max_samples
+        self.samples = {}
+        self.recent = deque(maxlen=max_traces)
+        self.listeners = []
+        self.sources = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.dump_stop = threading.Event()
+
+    def start(self, signal_id, started_ns=None):
+        trace = SignalTrace(signal_id, started_ns)
+        current_trace.set(trace)
+        return trace
+
+    def finish(self, trace):
+        breakdown = trace.breakdown()
+        with self.lock:
+            for stage, duration_ms in breakdown["spans"]:
+                self.samples.setdefault(stage, deque(maxlen=self.max_samples)).append(duration_ms)
+            self.samples.setdefault("total", deque(maxlen=self.max_samples)).append(breakdown["total_ms"])
+            self.recent.append(breakdown)
+        for listener in self.listeners:
+            try:
+                listener(breakdown)
+            except Exception as e:
+                logging.error("Latency listener failed: %s", e)
+        return breakdown
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def add_source(self, name, func):
+        # Extra stats (e.g. model routing) included in every report
+        self.sources[name] = func
+
+    def percentiles(self):
+        with self.lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self.samples.items()}
+        return {
+            stage: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 0.50), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+            }
+            for stage, samples in snapshot.items() if samples
+        }
+
+    def report(self):
+        with self.lock:
+            recent = list(self.recent)
+        report = {"stages": self.percentiles(), "recent": recent}
+        for name, func in self.sources.items():
+            report[name] = func()
+        return report
+
+    def dump(self, path=None):
+        report = self.report()
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+        # The stage dict is only rendered if the record is actually written
+        logging.info("Signal latency percentiles: %s", report['stages'])
+
+    def start_periodic_dump(self, interval=60.0, path=None):
+        def run():
+            while not self.dump_stop.wait(interval):
+                if self.samples:
+                    self.dump(path)
+        threading.Thread(target=run, name="latency-dump", daemon=True).start()
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        tracker = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(tracker.report()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="latency-metrics", daemon=True).start()
+        logging.info("Latency metrics available at http://%s:%s/metrics", host, port)
+
+    def stop(self):
+        self.dump_stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
@@ -1,4 +1,95 @@
 import logging
+import logging.handlers
+import queue
+import sys
+import threading
 
-def setup_logger():
-    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    # Hands records to the listener thread without formatting them and never
+    # blocks the caller. When the queue is full, records below WARNING are
+    # dropped; WARNING and above evict the oldest queued record instead.
+
+    def __init__(self, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.lock_counters = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    def prepare(self, record):
+        # Formatting is deferred to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                with self.lock_counters:
+                    self.dropped += 1
+                return
+            try:
+                self.queue.get_nowait()
+                with self.lock_counters:
+                    self.evicted += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                with self.lock_counters:
+                    self.dropped += 1
+                return
+        with self.lock_counters:
+            self.enqueued += 1
+
+
+class LogPipeline:
+    def __init__(self, level=logging.INFO, maxsize=10000, fmt=LOG_FORMAT):
+        self.queue_handler = BoundedQueueHandler(maxsize)
+        console = logging.StreamHandler(sys.stderr)
+        console.setFormatter(logging.Formatter(fmt))
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, console, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(level)
+        self.listener.start()
+
+    def add_handler(self, handler):
+        self.listener.handlers = self.listener.handlers + (handler,)
+
+    def remove_handler(self, handler):
+        self.listener.handlers = tuple(h for h in self.listener.handlers if h is not handler)
+
+    def stats(self):
+        handler = self.queue_handler
+        with handler.lock_counters:
+            return {
+                "enqueued": handler.enqueued,
+                "dropped": handler.dropped,
+                "evicted": handler.evicted,
+                "queue_depth": handler.queue.qsize(),
+            }
+
+    def stop(self):
+        self.listener.stop()
+
+
+pipeline = None
+
+
+def setup_logger(level=logging.INFO, maxsize=10000):
+    global pipeline
+    if pipeline is None:
+        pipeline = LogPipeline(level=level, maxsize=maxsize)
+    return pipeline
+
+
+def get_pipeline():
+    return pipeline
@@ -0,0 +1,53 @@
+import importlib
+import logging
+import threading
+import time
+
+
+class StartupTimer:
+    # Splits cold start into named phases. mark() closes the phase that began
+    # at the previous mark; ready() closes the last one and logs the total
+    # time-to-ready once, however often the client reconnects.
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.last = self.started
+        self.phases = []
+        self.ready_after = None
+        self.lock = threading.Lock()
+
+    def mark(self, phase):
+        with self.lock:
+            now = time.perf_counter()
+            self.phases.append((phase, now - self.last))
+            self.last = now
+
+    def ready(self, phase="connect"):
+        if self.ready_after is not None:
+            return
+        self.mark(phase)
+        self.ready_after = self.last - self.started
+        breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        logging.info("Ready in %.0f ms (%s)", self.ready_after * 1000, breakdown)
+
+    def report(self):
+        with self.lock:
+            return {
+                "ready_ms": None if self.ready_after is None else round(self.ready_after * 1000, 1),
+                "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            }
+
+
+def preload(*modules):
+    # Imports modules on a background thread while the caller does blocking
+    # work (e.g. the MT5 terminal handshake); a later import of the same
+    # module waits on the import lock instead of starting over.
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logging.debug("Preload of %s failed: %s", name, e)
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread